@@ -0,0 +1,68 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+# Saved-location access times are buffered in memory and written in one batched UPDATE
+ACCESS_FLUSH_INTERVAL_SECONDS = float(os.getenv('ACCESS_FLUSH_INTERVAL_SECONDS', '5'))
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = {}  # (location_id, user_id) -> latest access time (Unix seconds)
+_stats = {'recorded': 0, 'flushes': 0, 'rows_written': 0, 'flush_errors': 0}
+_write_batch = None
+_thread = None
+
+def record_access(location_id, user_id):
+    """Buffer a saved-location access; repeated accesses before a flush collapse into one row"""
+    with _lock:
+        _pending[(location_id, user_id)] = time.time()
+        _stats['recorded'] += 1
+
+def flush_access_updates():
+    """Write buffered access times in a single batch; failed batches are kept for the next flush"""
+    with _lock:
+        if not _pending or _write_batch is None:
+            return
+        batch = dict(_pending)
+        _pending.clear()
+
+    try:
+        written = _write_batch([(location_id, user_id, accessed_at) for (location_id, user_id), accessed_at in batch.items()])
+        with _lock:
+            _stats['flushes'] += 1
+            _stats['rows_written'] += max(written, 0)
+    except Exception as e:
+        logger.warning("Access update flush error: %s", e)
+        with _lock:
+            _stats['flush_errors'] += 1
+            for key, accessed_at in batch.items():
+                if _pending.get(key, 0) < accessed_at:
+                    _pending[key] = accessed_at
+
+def start_access_flusher(write_batch):
+    """
+    Start the periodic flush thread for this process and flush again at shutdown
+    write_batch([(location_id, user_id, unix_time), ...]) writes one batch and returns the rows updated
+    """
+    global _write_batch, _thread
+    with _lock:
+        _write_batch = write_batch
+        if _thread is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(ACCESS_FLUSH_INTERVAL_SECONDS)
+                flush_access_updates()
+
+        _thread = threading.Thread(target=run, name='access-flusher', daemon=True)
+    _thread.start()
+    atexit.register(flush_access_updates)
+
+def get_access_tracker_stats():
+    """Get buffered and written access counts"""
+    with _lock:
+        return dict(_stats, pending=len(_pending))
@@ -0,0 +1,283 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from circuit_breaker import CircuitOpenError, get_breaker
+from metrics import observe_upstream, record_ai_tokens
+
+logger = logging.getLogger(__name__)
+
+# Model, token limit, temperature and timeout for each kind of AI call
+# structured_output picks how JSON answers are requested: 'json_schema' (strict structured
+# output, gpt-4o and newer), 'json_object' (JSON mode) or 'off' (prompt instructions only)
+DEFAULT_AI_ROUTES = {
+    'context_analysis': {'model': 'gpt-3.5-turbo', 'max_tokens': 800, 'temperature': 0.7, 'timeout': 20, 'structured_output': 'json_object'},
+    'suggestions': {'model': 'gpt-3.5-turbo', 'max_tokens': 400, 'temperature': 0.6, 'timeout': 15, 'structured_output': 'json_object'},
+    'insights': {'model': 'gpt-3.5-turbo', 'max_tokens': 300, 'temperature': 0.8, 'timeout': 15, 'structured_output': 'json_object'},
+    'chatbot': {'model': 'gpt-3.5-turbo', 'max_tokens': 200, 'temperature': 0.7, 'timeout': 15}
+}
+
+# USD per 1K (prompt, completion) tokens, used for the cost budget
+DEFAULT_MODEL_PRICES = {
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-4o': (0.0025, 0.01)
+}
+
+# Budgets per worker process over a sliding minute; 0 disables a budget
+AI_TOKEN_BUDGET_PER_MINUTE = int(os.getenv('AI_TOKEN_BUDGET_PER_MINUTE', '100000'))
+AI_COST_BUDGET_PER_MINUTE = float(os.getenv('AI_COST_BUDGET_PER_MINUTE', '0'))
+
+LATENCY_BUCKETS_SECONDS = (0.25, 0.5, 1, 2, 5, 10, 30)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000)
+
+class AIBudgetExceeded(Exception):
+    """Raised when an AI call would exceed the per-minute token or cost budget"""
+
+# Every OpenAI call shares one breaker; calls slower than this count as failures
+OPENAI_SLOW_CALL_SECONDS = float(os.getenv('OPENAI_SLOW_CALL_SECONDS', '20'))
+openai_breaker = get_breaker('openai', slow_call_seconds=OPENAI_SLOW_CALL_SECONDS)
+
+def _load_json_env(name, default):
+    """Merge a JSON object from an environment variable over a default mapping"""
+    merged = {key: (dict(value) if isinstance(value, dict) else value) for key, value in default.items()}
+    raw = os.getenv(name)
+    if not raw:
+        return merged
+    try:
+        overrides = json.loads(raw)
+    except json.JSONDecodeError as e:
+        logger.warning("Ignoring invalid %s: %s", name, e)
+        return merged
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key].update(value)
+        else:
+            merged[key] = value
+    return merged
+
+# e.g. AI_ROUTES='{"chatbot": {"model": "gpt-4o-mini", "max_tokens": 300}}'
+AI_ROUTES = _load_json_env('AI_ROUTES', DEFAULT_AI_ROUTES)
+MODEL_PRICES = _load_json_env('AI_MODEL_PRICES', DEFAULT_MODEL_PRICES)
+
+_lock = threading.Lock()
+_window = deque()  # (timestamp, tokens, cost) of calls and reservations in the last minute
+_window_tokens = 0
+_window_cost = 0.0
+_call_stats = {}
+
+def get_route(call_type):
+    """Get the model settings for a call type"""
+    return AI_ROUTES.get(call_type, AI_ROUTES['chatbot'])
+
+def _cost(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0, 0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1000
+
+def _estimate_prompt_tokens(messages):
+    # Roughly four characters per token; exact usage replaces this once the call returns
+    return sum(len(message.get('content') or '') for message in messages) // 4 + 4 * len(messages)
+
+def _prune_window(now):
+    global _window_tokens, _window_cost
+    while _window and _window[0][0] <= now - 60:
+        _, tokens, cost = _window.popleft()
+        _window_tokens -= tokens
+        _window_cost -= cost
+
+def _reserve(call_type, route, messages):
+    """Reserve the worst-case usage of a call against the budget"""
+    global _window_tokens, _window_cost
+    prompt_tokens = _estimate_prompt_tokens(messages)
+    tokens = prompt_tokens + route['max_tokens']
+    cost = _cost(route['model'], prompt_tokens, route['max_tokens'])
+    now = time.time()
+
+    with _lock:
+        _prune_window(now)
+        if AI_TOKEN_BUDGET_PER_MINUTE and _window_tokens + tokens > AI_TOKEN_BUDGET_PER_MINUTE:
+            _record_budget_refusal(call_type)
+            raise AIBudgetExceeded(f"AI token budget of {AI_TOKEN_BUDGET_PER_MINUTE}/min exhausted")
+        if AI_COST_BUDGET_PER_MINUTE and _window_cost + cost > AI_COST_BUDGET_PER_MINUTE:
+            _record_budget_refusal(call_type)
+            raise AIBudgetExceeded(f"AI cost budget of ${AI_COST_BUDGET_PER_MINUTE}/min exhausted")
+        reservation = [now, tokens, cost]
+        _window.append(reservation)
+        _window_tokens += tokens
+        _window_cost += cost
+    return reservation
+
+def _settle(reservation, model, usage):
+    """Replace a reservation's estimate with the usage the API reported"""
+    global _window_tokens, _window_cost
+    if usage is None:
+        return
+    tokens = usage.prompt_tokens + usage.completion_tokens
+    cost = _cost(model, usage.prompt_tokens, usage.completion_tokens)
+    with _lock:
+        # Entries already pruned from the window no longer count towards it
+        if _window and _window[0][0] <= reservation[0]:
+            _window_tokens += tokens - reservation[1]
+            _window_cost += cost - reservation[2]
+        reservation[1] = tokens
+        reservation[2] = cost
+
+def _stats_for(call_type):
+    stats = _call_stats.get(call_type)
+    if stats is None:
+        stats = _call_stats[call_type] = {
+            'calls': 0,
+            'errors': 0,
+            'budget_refusals': 0,
+            'prompt_tokens': 0,
+            'completion_tokens': 0,
+            'cost': 0.0,
+            'latency_seconds': {'buckets': [0] * (len(LATENCY_BUCKETS_SECONDS) + 1), 'sum': 0.0, 'count': 0},
+            'total_tokens': {'buckets': [0] * (len(TOKEN_BUCKETS) + 1), 'sum': 0, 'count': 0}
+        }
+    return stats
+
+def _observe(histogram, bounds, value):
+    index = next((i for i, bound in enumerate(bounds) if value <= bound), len(bounds))
+    histogram['buckets'][index] += 1
+    histogram['sum'] += value
+    histogram['count'] += 1
+
+def _record_budget_refusal(call_type):
+    """Count a refused call; caller holds the lock"""
+    _stats_for(call_type)['budget_refusals'] += 1
+
+def _record_call(call_type, model, started, usage, error):
+    latency = time.time() - started
+    with _lock:
+        stats = _stats_for(call_type)
+        stats['calls'] += 1
+        _observe(stats['latency_seconds'], LATENCY_BUCKETS_SECONDS, latency)
+        if error:
+            stats['errors'] += 1
+        if usage is not None:
+            stats['prompt_tokens'] += usage.prompt_tokens
+            stats['completion_tokens'] += usage.completion_tokens
+            stats['cost'] += _cost(model, usage.prompt_tokens, usage.completion_tokens)
+            _observe(stats['total_tokens'], TOKEN_BUCKETS, usage.prompt_tokens + usage.completion_tokens)
+    observe_upstream(call_type, latency, error=error)
+    if usage is not None:
+        record_ai_tokens(call_type, usage.prompt_tokens, usage.completion_tokens)
+    logger.log(
+        logging.WARNING if error else logging.DEBUG,
+        "AI call failed" if error else "AI call",
+        extra={
+            'dependency': 'openai',
+            'call_type': call_type,
+            'model': model,
+            'duration_ms': round(latency * 1000, 1),
+            'total_tokens': usage.prompt_tokens + usage.completion_tokens if usage is not None else None
+        }
+    )
+
+def create_chat_completion(client, call_type, messages, response_format=None, **overrides):
+    """
+    Make a chat completion with the call type's routed model settings
+    Raises AIBudgetExceeded when the per-minute budget is used up and CircuitOpenError
+    while OpenAI is failing, in both cases without calling the API
+    """
+    route = dict(get_route(call_type), **overrides)
+    if not openai_breaker.allow_request():
+        raise CircuitOpenError("OpenAI is unavailable (circuit open)")
+    try:
+        reservation = _reserve(call_type, route, messages)
+    except AIBudgetExceeded:
+        # No call was made, so free a half-open probe slot without judging the dependency
+        openai_breaker.cancel()
+        raise
+    started = time.time()
+    extra = {'response_format': response_format} if response_format else {}
+    try:
+        response = client.chat.completions.create(
+            model=route['model'],
+            messages=messages,
+            max_tokens=route['max_tokens'],
+            temperature=route['temperature'],
+            timeout=route['timeout'],
+            **extra
+        )
+    except Exception as e:
+        # OpenAI errors carry the HTTP status; timeouts and connection errors have none
+        openai_breaker.record_error(getattr(e, 'status_code', None), time.time() - started)
+        _record_call(call_type, route['model'], started, None, error=True)
+        raise
+    openai_breaker.record_success(time.time() - started)
+    _settle(reservation, route['model'], response.usage)
+    _record_call(call_type, route['model'], started, response.usage, error=False)
+    return response
+
+def stream_chat_completion(client, call_type, messages, **overrides):
+    """
+    Stream a chat completion with routed settings, yielding content tokens
+    Usage and latency are recorded once the stream ends
+    """
+    route = dict(get_route(call_type), **overrides)
+    if not openai_breaker.allow_request():
+        raise CircuitOpenError("OpenAI is unavailable (circuit open)")
+    try:
+        reservation = _reserve(call_type, route, messages)
+    except AIBudgetExceeded:
+        openai_breaker.cancel()
+        raise
+    started = time.time()
+    usage = None
+    error = True
+    status_code = None
+    try:
+        stream = client.chat.completions.create(
+            model=route['model'],
+            messages=messages,
+            max_tokens=route['max_tokens'],
+            temperature=route['temperature'],
+            timeout=route['timeout'],
+            stream=True,
+            stream_options={'include_usage': True}
+        )
+        for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            token = chunk.choices[0].delta.content
+            if token:
+                yield token
+        error = False
+    except GeneratorExit:
+        # The client went away; the dependency itself was answering
+        error = False
+        raise
+    except Exception as e:
+        status_code = getattr(e, 'status_code', None)
+        raise
+    finally:
+        if error:
+            openai_breaker.record_error(status_code, time.time() - started)
+        else:
+            openai_breaker.record_success(time.time() - started)
+        _settle(reservation, route['model'], usage)
+        _record_call(call_type, route['model'], started, usage, error)
+
+def get_ai_router_stats():
+    """Get routes, budget usage and per-call-type latency/token histograms"""
+    with _lock:
+        _prune_window(time.time())
+        return {
+            'routes': AI_ROUTES,
+            'budget': {
+                'tokens_per_minute': AI_TOKEN_BUDGET_PER_MINUTE,
+                'cost_per_minute': AI_COST_BUDGET_PER_MINUTE,
+                'tokens_used': _window_tokens,
+                'cost_used': round(_window_cost, 6)
+            },
+            'latency_buckets_seconds': LATENCY_BUCKETS_SECONDS,
+            'token_buckets': TOKEN_BUCKETS,
+            'calls': json.loads(json.dumps(_call_stats))
+        }
@@ -0,0 +1,68 @@
+# JSON schemas for structured AI responses
+# Kept within the subset OpenAI's strict structured output accepts: every property is
+# required and objects allow no additional properties
+
+def _string_list_schema(key):
+    return {
+        "type": "object",
+        "properties": {
+            key: {"type": "array", "items": {"type": "string"}}
+        },
+        "required": [key],
+        "additionalProperties": False
+    }
+
+CONTEXT_ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "context_warnings": {"type": "array", "items": {"type": "string"}},
+        "suggestions": {"type": "array", "items": {"type": "string"}},
+        "fun_facts": {"type": "array", "items": {"type": "string"}},
+        "climate_comparison": {"type": "string"}
+    },
+    "required": ["context_warnings", "suggestions", "fun_facts", "climate_comparison"],
+    "additionalProperties": False
+}
+
+# JSON mode only returns objects, so string lists are wrapped in a single key
+SUGGESTIONS_SCHEMA = _string_list_schema("suggestions")
+INSIGHTS_SCHEMA = _string_list_schema("fun_facts")
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "number": (int, float),
+    "integer": int
+}
+
+def validate_schema(value, schema, path="$"):
+    """
+    Check a parsed JSON value against a schema from this module
+    Returns None when it matches, otherwise a short description of the first mismatch
+    """
+    expected = schema.get("type")
+    python_type = _TYPES.get(expected)
+    # bool is an int subclass, but JSON keeps them apart
+    if python_type and (not isinstance(value, python_type) or (expected in ("number", "integer") and isinstance(value, bool))):
+        return f"{path} should be {expected}, got {type(value).__name__}"
+
+    if expected == "object":
+        for key in schema.get("required", []):
+            if key not in value:
+                return f"{path} is missing required key '{key}'"
+        properties = schema.get("properties", {})
+        for key, item in value.items():
+            if key in properties:
+                error = validate_schema(item, properties[key], f"{path}.{key}")
+                if error:
+                    return error
+            elif schema.get("additionalProperties") is False:
+                return f"{path} has unexpected key '{key}'"
+    elif expected == "array" and "items" in schema:
+        for index, item in enumerate(value):
+            error = validate_schema(item, schema["items"], f"{path}[{index}]")
+            if error:
+                return error
+    return None
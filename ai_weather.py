@@ -1,52 +1,209 @@
 import openai
+import httpx
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import json
-import re
 import asyncio
 import threading
-from concurrent.futures import ThreadPoolExecutor
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app_logging import in_current_context
+from weather_rules import generate_rule_based_insights
+from ai_router import AIBudgetExceeded, create_chat_completion, get_route
+from ai_schemas import CONTEXT_ANALYSIS_SCHEMA, INSIGHTS_SCHEMA, SUGGESTIONS_SCHEMA, validate_schema
+from circuit_breaker import CircuitOpenError
+from json_extraction import extract_json_from_response
+from metrics import record_forecast_prompt_tokens, track_ai_job
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:
+    # tiktoken is optional; token counts fall back to an estimate
+    tiktoken = None
+
+# Shared OpenAI client, created lazily once per process (gunicorn workers fork before first use)
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+OPENAI_TIMEOUT_SECONDS = float(os.getenv('OPENAI_TIMEOUT_SECONDS', '30'))
+OPENAI_CONNECT_TIMEOUT_SECONDS = float(os.getenv('OPENAI_CONNECT_TIMEOUT_SECONDS', '5'))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+OPENAI_MAX_CONNECTIONS = int(os.getenv('OPENAI_MAX_CONNECTIONS', '20'))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('OPENAI_MAX_KEEPALIVE_CONNECTIONS', '10'))
 
 def get_openai_client():
-    """Get OpenAI client with API key from environment"""
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key:
-        print("ERROR: OPENAI_API_KEY environment variable not set")
-        raise ValueError("OPENAI_API_KEY environment variable not set")
-    print(f"OpenAI API key found: {api_key[:10]}...")
-    return openai.OpenAI(api_key=api_key)
-
-def extract_json_from_response(content):
-    """Extract JSON from AI response, handling various formats"""
+    """Get the shared OpenAI client, creating it on first use"""
+    global _openai_client
+    if _openai_client is not None:
+        return _openai_client
+    
+    with _openai_client_lock:
+        if _openai_client is None:
+            api_key = os.getenv('OPENAI_API_KEY')
+            if not api_key:
+                logger.error("OPENAI_API_KEY environment variable not set")
+                raise ValueError("OPENAI_API_KEY environment variable not set")
+            
+            # One keep-alive connection pool for every AI call in this process
+            timeout = httpx.Timeout(OPENAI_TIMEOUT_SECONDS, connect=OPENAI_CONNECT_TIMEOUT_SECONDS)
+            http_client = openai.DefaultHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS
+                ),
+                timeout=timeout
+            )
+            _openai_client = openai.OpenAI(
+                api_key=api_key,
+                http_client=http_client,
+                timeout=timeout,
+                max_retries=OPENAI_MAX_RETRIES
+            )
+            logger.info("OpenAI client initialized")
+    
+    return _openai_client
+
+# Running totals of forecast prompt tokens, raw JSON versus the compact table
+_forecast_prompt_token_stats = {"encodings": 0, "estimated_encodings": 0, "json_tokens": 0, "table_tokens": 0}
+_forecast_prompt_token_stats_lock = threading.Lock()
+
+# Loaded in the background on first use: on a fresh container get_encoding downloads the BPE file
+# with no timeout, which must not block imports or requests
+_token_encoding = None
+_token_encoding_loading = False
+_token_encoding_lock = threading.Lock()
+
+def _load_token_encoding():
+    global _token_encoding
     try:
-        # First try direct JSON parsing
-        return json.loads(content)
-    except json.JSONDecodeError:
-        # Try to extract JSON from markdown code blocks
-        json_match = re.search(r'```json\s*(\{.*?\})\s*```', content, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1))
-            except json.JSONDecodeError:
-                pass
-        
-        # Try to extract JSON from code blocks without language specifier
-        json_match = re.search(r'```\s*(\{.*?\})\s*```', content, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group(1))
-            except json.JSONDecodeError:
-                pass
-        
-        # Try to find JSON object in the text
-        json_match = re.search(r'\{.*\}', content, re.DOTALL)
-        if json_match:
-            try:
-                return json.loads(json_match.group(0))
-            except json.JSONDecodeError:
-                pass
-        
-        return None
+        _token_encoding = tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning("Could not load the tiktoken encoding, estimating token counts: %s", e)
+
+def count_tokens(text):
+    """Count model tokens in text, estimating until the tiktoken encoding has loaded or when it is not installed"""
+    global _token_encoding_loading
+    if _token_encoding is None and tiktoken is not None and not _token_encoding_loading:
+        with _token_encoding_lock:
+            if not _token_encoding_loading:
+                _token_encoding_loading = True
+                threading.Thread(target=_load_token_encoding, name='tiktoken-loader', daemon=True).start()
+    encoding = _token_encoding
+    if encoding is not None:
+        return len(encoding.encode(text))
+    # Roughly four characters per token for English text
+    return (len(text) + 3) // 4
+
+def get_forecast_prompt_token_stats():
+    """
+    Get forecast prompt token totals for the raw JSON and the table that replaced it
+    estimated is true when some counts are the chars/4 estimate (tiktoken missing or its encoding not loaded yet),
+    which overstates what JSON whitespace costs
+    """
+    with _forecast_prompt_token_stats_lock:
+        stats = dict(_forecast_prompt_token_stats)
+    json_tokens = stats["json_tokens"]
+    stats["saved_percent"] = round(100 - stats["table_tokens"] * 100 / json_tokens, 1) if json_tokens else 0.0
+    stats["estimated"] = stats["estimated_encodings"] > 0
+    return stats
+
+def encode_forecast_for_prompt(daily):
+    """
+    Encode daily forecast entries as a dense table for model prompts
+    Keeps date, high/low, condition, rain chance and UV index; drops epochs, icons and ids
+    """
+    rows = ["Date | High/Low °F | Condition | Rain % | UVI"]
+    for day in daily:
+        temp = day.get('temp', {})
+        weather = day.get('weather') or [{}]
+        # Daily dt is local noon, so the UTC calendar date is the local date
+        date = datetime.fromtimestamp(day['dt'], tz=timezone.utc).strftime('%a %b %d') if 'dt' in day else 'N/A'
+        high = round(temp['max']) if 'max' in temp else 'N/A'
+        low = round(temp['min']) if 'min' in temp else 'N/A'
+        condition = weather[0].get('description', 'N/A')
+        pop = round(day.get('pop', 0) * 100)
+        uvi = round(day.get('uvi', 0), 1)
+        rows.append(f"{date} | {high}/{low} | {condition} | {pop} | {uvi}")
+    
+    table = "\n".join(rows)
+    
+    estimated = _token_encoding is None
+    json_tokens = count_tokens(json.dumps(daily, indent=2))
+    table_tokens = count_tokens(table)
+    with _forecast_prompt_token_stats_lock:
+        _forecast_prompt_token_stats["encodings"] += 1
+        _forecast_prompt_token_stats["estimated_encodings"] += estimated
+        _forecast_prompt_token_stats["json_tokens"] += json_tokens
+        _forecast_prompt_token_stats["table_tokens"] += table_tokens
+    record_forecast_prompt_tokens(json_tokens, table_tokens, estimated=estimated)
+    saved = 100 - (table_tokens * 100 // json_tokens) if json_tokens else 0
+    logger.debug("Forecast prompt tokens", extra={'json_tokens': json_tokens, 'table_tokens': table_tokens, 'saved_percent': saved})
+    
+    return table
+
+_structured_stats_lock = threading.Lock()
+_structured_stats = {}
+
+def _record_structured_outcome(call_type, outcome):
+    with _structured_stats_lock:
+        stats = _structured_stats.setdefault(call_type, {'responses': 0, 'parse_failures': 0, 'schema_mismatches': 0, 'retries': 0, 'failed': 0})
+        stats[outcome] += 1
+
+def _response_format(call_type, schema_name, schema):
+    mode = get_route(call_type).get('structured_output', 'off')
+    if mode == 'json_schema':
+        return {'type': 'json_schema', 'json_schema': {'name': schema_name, 'schema': schema, 'strict': True}}
+    if mode == 'json_object':
+        return {'type': 'json_object'}
+    return None
+
+def request_structured_json(client, call_type, messages, schema_name, schema):
+    """
+    Ask for a JSON answer matching schema, using the route's structured output mode
+    Validates locally and retries once on a parse failure or schema mismatch
+    Returns (value, raw content); value is None when both attempts fail
+    """
+    messages = list(messages)
+    response_format = _response_format(call_type, schema_name, schema)
+    content = None
+    for attempt in range(2):
+        response = create_chat_completion(client, call_type, messages, response_format=response_format)
+        content = response.choices[0].message.content or ''
+        _record_structured_outcome(call_type, 'responses')
+
+        value = extract_json_from_response(content, dict)
+        if value is None:
+            _record_structured_outcome(call_type, 'parse_failures')
+            error = "it was not valid JSON"
+        else:
+            error = validate_schema(value, schema)
+            if error is None:
+                return value, content
+            _record_structured_outcome(call_type, 'schema_mismatches')
+
+        logger.warning("Structured %s response rejected (%s)", call_type, error, extra={'content_preview': content[:200]})
+        if attempt == 0:
+            _record_structured_outcome(call_type, 'retries')
+            messages += [
+                {"role": "assistant", "content": content},
+                {"role": "user", "content": f"That reply did not match the required JSON format: {error}. Reply again with only the corrected JSON object."}
+            ]
+
+    _record_structured_outcome(call_type, 'failed')
+    return None, content
+
+def get_structured_output_stats():
+    """Get per-call-type structured response counts and the share of responses that failed to parse"""
+    with _structured_stats_lock:
+        return {
+            call_type: dict(
+                stats,
+                parse_failure_rate=round((stats['parse_failures'] + stats['schema_mismatches']) / stats['responses'], 4) if stats['responses'] else 0.0
+            )
+            for call_type, stats in _structured_stats.items()
+        }
 
 def analyze_weather_context(user_location, target_location, weather_data):
     """
@@ -54,9 +211,6 @@ def analyze_weather_context(user_location, target_location, weather_data):
     Returns AI-generated insights about climate differences and local context
     """
     try:
-        print(f"Starting AI context analysis...")
-        print(f"User location: {user_location}")
-        print(f"Target location: {target_location}")
         
         client = get_openai_client()
         
@@ -65,7 +219,7 @@ def analyze_weather_context(user_location, target_location, weather_data):
         forecast = weather_data.get('forecast', {})
         daily = forecast.get('daily', [])
         
-        print(f"Weather data structure: current={bool(current)}, forecast={bool(forecast)}, daily_count={len(daily)}")
+        forecast_table = encode_forecast_for_prompt(daily[:3])
         
         # Check if user is viewing their current location (same coordinates)
         user_lat = user_location.get('lat', 0)
@@ -93,8 +247,8 @@ CURRENT WEATHER:
 - Wind speed: {current.get('wind', {}).get('speed', 'N/A')} mph
 - Weather description: {current.get('weather', [{}])[0].get('description', 'N/A')}
 
-5-DAY FORECAST:
-{json.dumps(daily[:3], indent=2)}
+3-DAY FORECAST:
+{forecast_table}
 
 Please provide specific, actionable insights about the current weather conditions and forecast for this location. Focus on local weather patterns, comfort tips, and interesting facts about this area.
 
@@ -134,8 +288,8 @@ CURRENT WEATHER:
 - Wind speed: {current.get('wind', {}).get('speed', 'N/A')} mph
 - Weather description: {current.get('weather', [{}])[0].get('description', 'N/A')}
 
-5-DAY FORECAST:
-{json.dumps(daily[:3], indent=2)}
+3-DAY FORECAST:
+{forecast_table}
 
 Please provide specific, actionable insights comparing the user's location with the target location. Consider climate differences, weather patterns, and practical advice.
 
@@ -156,45 +310,43 @@ Example response format:
 Focus on specific, actionable insights that would help someone from the user's location understand the target location's weather.
 """
         
-        print(f"Sending prompt to OpenAI...")
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a helpful weather assistant that provides location-based weather insights and practical suggestions. Always respond with valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=800,
-            temperature=0.7
-        )
+        parsed_response, content = request_structured_json(client, 'context_analysis', [
+            {"role": "system", "content": "You are a helpful weather assistant that provides location-based weather insights and practical suggestions. Always respond with valid JSON."},
+            {"role": "user", "content": prompt}
+        ], 'weather_context_analysis', CONTEXT_ANALYSIS_SCHEMA)
+        logger.debug("Context analysis response: %s", content[:200])
         
-        # Parse the response
-        content = response.choices[0].message.content
-        print(f"OpenAI response received: {content[:200]}...")
-        
-        # Try to extract JSON from the response
-        parsed_response = extract_json_from_response(content)
         if parsed_response:
-            print(f"Successfully parsed JSON response: {parsed_response}")
             return parsed_response
         else:
-            print(f"Failed to parse JSON from response: {content}")
-            # Fallback: create structured response from text
+            logger.warning("Context analysis fell back to rule-based insights")
+            # Fallback: rule-based insights computed from the forecast
+            rule_insights = generate_rule_based_insights(weather_data)
             return {
-                "context_warnings": ["Weather conditions may differ from your usual climate"],
-                "suggestions": ["Check local weather updates regularly"],
+                "context_warnings": rule_insights["context_warnings"],
+                "suggestions": rule_insights["suggestions"],
                 "fun_facts": ["Weather patterns vary significantly by location"],
                 "climate_comparison": "Climate differences may affect how weather feels",
                 "raw_response": content
             }
             
+    except (AIBudgetExceeded, CircuitOpenError) as e:
+        # Over budget or OpenAI failing: degrade to the rule-based insights without calling the model
+        logger.info("AI analysis skipped: %s", e)
+        rule_insights = generate_rule_based_insights(weather_data)
+        return {
+            "context_warnings": rule_insights["context_warnings"],
+            "suggestions": rule_insights["suggestions"],
+            "fun_facts": [],
+            "climate_comparison": "Unable to analyze climate differences",
+            "budget_exhausted": True
+        }
     except Exception as e:
-        print(f"AI analysis error: {e}")
-        print(f"Error type: {type(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("AI analysis error")
+        rule_insights = generate_rule_based_insights(weather_data)
         return {
-            "context_warnings": [],
-            "suggestions": [],
+            "context_warnings": rule_insights["context_warnings"],
+            "suggestions": rule_insights["suggestions"],
             "fun_facts": [],
             "climate_comparison": "Unable to analyze climate differences",
             "error": str(e)
@@ -203,19 +355,18 @@ Focus on specific, actionable insights that would help someone from the user's l
 def generate_weather_suggestions(weather_data, user_location):
     """
     Generate personalized weather suggestions based on forecast
+    Returns {"suggestions": [...]}, plus the same fallback flag as analyze_weather_context when the rules answered
     """
     try:
-        print(f"Generating weather suggestions for {user_location.get('name', 'unknown location')}")
         client = get_openai_client()
         
         daily = weather_data.get('forecast', {}).get('daily', [])
-        print(f"Daily forecast count: {len(daily)}")
         
         prompt = f"""
-Based on this 5-day weather forecast, provide practical suggestions for someone in {user_location.get('name', 'this location')}.
+Based on this 8-day weather forecast, provide practical suggestions for someone in {user_location.get('name', 'this location')}.
 
 FORECAST DATA:
-{json.dumps(daily, indent=2)}
+{encode_forecast_for_prompt(daily)}
 
 Provide 3-5 specific, practical suggestions including:
 - Outdoor activity recommendations
@@ -223,49 +374,49 @@ Provide 3-5 specific, practical suggestions including:
 - Timing for outdoor tasks
 - Weather-related precautions
 
-IMPORTANT: Respond with ONLY a valid JSON array of strings.
+IMPORTANT: Respond with ONLY a valid JSON object with a "suggestions" key holding an array of strings.
 
 Example response format:
-["Stay hydrated in the dry climate", "Plan outdoor activities for early morning", "Bring sunscreen for UV protection"]
+{{"suggestions": ["Stay hydrated in the dry climate", "Plan outdoor activities for early morning", "Bring sunscreen for UV protection"]}}
 
 Focus on actionable, specific advice based on the actual weather data.
 """
         
-        print(f"Sending suggestions prompt to OpenAI...")
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You provide practical weather-based suggestions. Always respond with valid JSON arrays."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=400,
-            temperature=0.6
-        )
+        parsed, content = request_structured_json(client, 'suggestions', [
+            {"role": "system", "content": "You provide practical weather-based suggestions. Always respond with valid JSON."},
+            {"role": "user", "content": prompt}
+        ], 'weather_suggestions', SUGGESTIONS_SCHEMA)
+        logger.debug("Suggestions response: %s", content[:200])
         
-        content = response.choices[0].message.content
-        print(f"Suggestions response: {content[:200]}...")
-        
-        # Try to extract JSON array from the response
-        parsed_suggestions = extract_json_from_response(content)
-        if parsed_suggestions and isinstance(parsed_suggestions, list):
-            print(f"Parsed suggestions: {parsed_suggestions}")
-            return parsed_suggestions
+        parsed_suggestions = parsed["suggestions"] if parsed else None
+        if parsed_suggestions:
+            return {"suggestions": parsed_suggestions}
         else:
-            print(f"Failed to parse suggestions JSON: {content}")
-            return ["Check the weather before planning outdoor activities", "Dress appropriately for the conditions"]
+            logger.warning("Suggestions fell back to rule-based suggestions")
+            return {
+                "suggestions": generate_rule_based_insights(weather_data)["suggestions"] or ["Check the weather before planning outdoor activities", "Dress appropriately for the conditions"],
+                "raw_response": content
+            }
             
+    except (AIBudgetExceeded, CircuitOpenError) as e:
+        logger.info("Suggestions generation skipped: %s", e)
+        return {
+            "suggestions": generate_rule_based_insights(weather_data)["suggestions"] or ["Stay updated with local weather conditions"],
+            "budget_exhausted": True
+        }
     except Exception as e:
-        print(f"Suggestions generation error: {e}")
-        import traceback
-        traceback.print_exc()
-        return ["Stay updated with local weather conditions"]
+        logger.exception("Suggestions generation error")
+        return {
+            "suggestions": generate_rule_based_insights(weather_data)["suggestions"] or ["Stay updated with local weather conditions"],
+            "error": str(e)
+        }
 
 def create_weather_insights(weather_data, location_data):
     """
     Create interesting weather insights and fun facts
+    Returns {"fun_facts": [...]}, plus the same fallback flag as analyze_weather_context when no model reply was used
     """
     try:
-        print(f"Creating weather insights for {location_data.get('name', 'unknown location')}")
         client = get_openai_client()
         
         current = weather_data.get('current', {})
@@ -284,100 +435,61 @@ Focus on:
 - Seasonal insights
 - Weather records or averages
 
-IMPORTANT: Respond with ONLY a valid JSON array of strings.
+IMPORTANT: Respond with ONLY a valid JSON object with a "fun_facts" key holding an array of strings.
 
 Example response format:
-["Phoenix averages 330 sunny days per year", "The city experiences monsoon season from July to September"]
+{{"fun_facts": ["Phoenix averages 330 sunny days per year", "The city experiences monsoon season from July to September"]}}
 
 Focus on specific, interesting facts about the location's weather patterns.
 """
         
-        print(f"Sending insights prompt to OpenAI...")
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You provide interesting weather facts and insights. Always respond with valid JSON arrays."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300,
-            temperature=0.8
-        )
+        parsed, content = request_structured_json(client, 'insights', [
+            {"role": "system", "content": "You provide interesting weather facts and insights. Always respond with valid JSON."},
+            {"role": "user", "content": prompt}
+        ], 'weather_insights', INSIGHTS_SCHEMA)
+        logger.debug("Insights response: %s", content[:200])
         
-        content = response.choices[0].message.content
-        print(f"Insights response: {content[:200]}...")
-        
-        # Try to extract JSON array from the response
-        parsed_insights = extract_json_from_response(content)
-        if parsed_insights and isinstance(parsed_insights, list):
-            print(f"Parsed insights: {parsed_insights}")
-            return parsed_insights
+        parsed_insights = parsed["fun_facts"] if parsed else None
+        if parsed_insights:
+            return {"fun_facts": parsed_insights}
         else:
-            print(f"Failed to parse insights JSON: {content}")
-            return ["Weather patterns can vary significantly throughout the day"]
+            logger.warning("Insights fell back to a generic fact")
+            return {"fun_facts": ["Weather patterns can vary significantly throughout the day"], "raw_response": content}
             
+    except (AIBudgetExceeded, CircuitOpenError) as e:
+        logger.info("Weather insights skipped: %s", e)
+        return {"fun_facts": ["Weather conditions change throughout the day"], "budget_exhausted": True}
     except Exception as e:
-        print(f"Weather insights error: {e}")
-        import traceback
-        traceback.print_exc()
-        return ["Weather conditions change throughout the day"]
+        logger.exception("Weather insights error")
+        return {"fun_facts": ["Weather conditions change throughout the day"], "error": str(e)}
+
+# Keys a section result carries when it came from the rules instead of the model
+_FALLBACK_FLAGS = ("budget_exhausted", "error", "raw_response")
 
-def get_comprehensive_ai_analysis_async(user_location, target_location, weather_data):
+def get_comprehensive_ai_analysis_async(user_location, target_location, weather_data, on_section=None, on_complete=None):
     """
     Get comprehensive AI analysis asynchronously - returns immediately with loading state
+
+    Sections are reported through on_section(name, value) as they finish and the
+    final result is handed to on_complete(result).
     """
     def run_ai_analysis():
         """Run AI analysis in background thread"""
-        try:
-            print(f"Starting comprehensive AI analysis in background...")
-            print(f"User location: {user_location}")
-            print(f"Target location: {target_location}")
-            
-            # Get context analysis
-            print("Getting context analysis...")
-            context_analysis = analyze_weather_context(user_location, target_location, weather_data)
-            
-            # Get suggestions
-            print("Getting weather suggestions...")
-            suggestions = generate_weather_suggestions(weather_data, user_location)
-            
-            # Get insights
-            print("Getting weather insights...")
-            insights = create_weather_insights(weather_data, target_location)
-            
-            result = {
-                "context_warnings": context_analysis.get("context_warnings", []),
-                "suggestions": suggestions,
-                "fun_facts": insights,
-                "climate_comparison": context_analysis.get("climate_comparison", ""),
-                "ai_generated": True,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            print(f"Final AI analysis result: {result}")
-            return result
-            
-        except Exception as e:
-            print(f"Comprehensive AI analysis error: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "context_warnings": [],
-                "suggestions": ["Check local weather updates"],
-                "fun_facts": ["Weather patterns vary by location"],
-                "climate_comparison": "Climate differences may affect weather perception",
-                "ai_generated": False,
-                "error": str(e),
-                "timestamp": datetime.now().isoformat()
-            }
+        with track_ai_job():
+            result = get_comprehensive_ai_analysis(user_location, target_location, weather_data, on_section=on_section)
+        if on_complete:
+            on_complete(result)
     
     # Start AI analysis in background thread
-    executor = ThreadPoolExecutor(max_workers=1)
-    future = executor.submit(run_ai_analysis)
+    thread = threading.Thread(target=in_current_context(run_ai_analysis))
+    thread.daemon = True
+    thread.start()
     
-    # Return immediately with loading state (without the future object)
+    # Return immediately with rule-based insights while the AI runs
+    rule_insights = generate_rule_based_insights(weather_data)
     return {
-        "context_warnings": ["AI analysis in progress..."],
-        "suggestions": ["Loading personalized suggestions..."],
+        "context_warnings": rule_insights["context_warnings"],
+        "suggestions": rule_insights["suggestions"],
         "fun_facts": ["Loading weather insights..."],
         "climate_comparison": "Analyzing climate differences...",
         "ai_generated": False,
@@ -385,49 +497,69 @@ def get_comprehensive_ai_analysis_async(user_location, target_location, weather_
         "timestamp": datetime.now().isoformat()
     }
 
-def get_comprehensive_ai_analysis(user_location, target_location, weather_data):
+def get_comprehensive_ai_analysis(user_location, target_location, weather_data, on_section=None):
     """
     Get comprehensive AI analysis including context, suggestions, and insights
+
+    The three AI calls run concurrently; on_section(name, value) is called for each
+    result section as soon as the call producing it completes.
     """
     try:
-        print(f"Starting comprehensive AI analysis...")
-        print(f"User location: {user_location}")
-        print(f"Target location: {target_location}")
-        
-        # Get context analysis
-        print("Getting context analysis...")
-        context_analysis = analyze_weather_context(user_location, target_location, weather_data)
+        sections = {}
+        # Calls answered by the model; the others fell back to rules
+        from_model = set()
+        budget_exhausted = False
         
-        # Get suggestions
-        print("Getting weather suggestions...")
-        suggestions = generate_weather_suggestions(weather_data, user_location)
+        def report(name, value):
+            sections[name] = value
+            if on_section:
+                try:
+                    on_section(name, value)
+                except Exception:
+                    logger.exception("AI section callback error for %s", name)
         
-        # Get insights
-        print("Getting weather insights...")
-        insights = create_weather_insights(weather_data, target_location)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = {
+                executor.submit(in_current_context(analyze_weather_context), user_location, target_location, weather_data): "context",
+                executor.submit(in_current_context(generate_weather_suggestions), weather_data, user_location): "suggestions",
+                executor.submit(in_current_context(create_weather_insights), weather_data, target_location): "fun_facts"
+            }
+            
+            for future in as_completed(futures):
+                kind = futures[future]
+                logger.debug("AI %s analysis finished", kind)
+                section_result = future.result()
+                if not any(flag in section_result for flag in _FALLBACK_FLAGS):
+                    from_model.add(kind)
+                budget_exhausted = budget_exhausted or section_result.get("budget_exhausted", False)
+                if kind == "context":
+                    report("context_warnings", section_result.get("context_warnings", []))
+                    report("climate_comparison", section_result.get("climate_comparison", ""))
+                else:
+                    report(kind, section_result[kind])
         
         result = {
-            "context_warnings": context_analysis.get("context_warnings", []),
-            "suggestions": suggestions,
-            "fun_facts": insights,
-            "climate_comparison": context_analysis.get("climate_comparison", ""),
-            "ai_generated": True,
+            "context_warnings": sections["context_warnings"],
+            "suggestions": sections["suggestions"],
+            "fun_facts": sections["fun_facts"],
+            "climate_comparison": sections["climate_comparison"],
+            "ai_generated": bool(from_model),
             "timestamp": datetime.now().isoformat()
         }
+        if budget_exhausted:
+            result["budget_exhausted"] = True
         
-        print(f"Final AI analysis result: {result}")
         return result
         
     except Exception as e:
-        print(f"Comprehensive AI analysis error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Comprehensive AI analysis error")
+        rule_insights = generate_rule_based_insights(weather_data)
         return {
-            "context_warnings": [],
-            "suggestions": ["Check local weather updates"],
+            "context_warnings": rule_insights["context_warnings"],
+            "suggestions": rule_insights["suggestions"] or ["Check local weather updates"],
             "fun_facts": ["Weather patterns vary by location"],
             "climate_comparison": "Climate differences may affect weather perception",
             "ai_generated": False,
             "error": str(e),
             "timestamp": datetime.now().isoformat()
-        } 
\ No newline at end of file
+        }
@@ -1,54 +1,135 @@
-from flask import Flask, jsonify, render_template_string, request
+from flask import Flask, Response, g, jsonify, make_response, render_template_string, request, stream_with_context
+from app_logging import in_current_context, new_request_id, setup_logging
+from werkzeug.middleware.proxy_fix import ProxyFix
 import os
+import json
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import requests
 from datetime import datetime, timedelta
 from dashboard import weather_dashboard
-from ai_weather import get_comprehensive_ai_analysis, get_comprehensive_ai_analysis_async
+from forecast_cache import get_cached_forecast, get_forecast_by_id, get_forecast_cache_stats, get_forecast_expiry, make_location_key, store_forecast
+from ai_weather import get_comprehensive_ai_analysis_async, get_forecast_prompt_token_stats, get_openai_client, get_structured_output_stats
+from ai_router import AIBudgetExceeded, create_chat_completion, get_ai_router_stats, stream_chat_completion
+from weather_rules import generate_rule_based_insights, local_time
+from circuit_breaker import CircuitOpenError, get_breaker, get_breaker_states
+from chat_sessions import build_conversation_messages, record_turn, start_conversation
+from chat_answer_cache import find_cached_answer, get_answer_cache_stats, store_answer
+from chat_intents import answer_locally, get_intent_router_stats
+from rate_limit import RATE_LIMIT_ENABLED, acquire_job_slot, check_rate_limit
+from cache_warmer import get_cache_warmer_stats, start_cache_warmer
+from access_tracker import get_access_tracker_stats, record_access, start_access_flusher
+from session_reaper import get_session_reaper_stats, start_session_reaper
+from migrate import run_migrations
+import queries
+from health_checker import get_dependency_status, register_check, start_health_checker
+from metrics import METRICS_ENABLED, METRICS_TOKEN, observe_request, observe_upstream, render_metrics
 import threading
 import time
-from openai import OpenAI
 import bcrypt
 import secrets
 import re
 from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+setup_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Store AI analysis futures
+# Railway terminates requests at a proxy; trust its X-Forwarded-For so remote_addr is the client
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '1'))
+if TRUSTED_PROXY_COUNT > 0:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXY_COUNT)
+
+@app.before_request
+def assign_request_id():
+    """Give each request a correlation id that every log line made on its behalf carries"""
+    g.request_id = new_request_id(request.headers.get('X-Request-ID'))
+    g.request_started = time.time()
+
+@app.after_request
+def add_request_id_header(response):
+    response.headers['X-Request-ID'] = g.get('request_id', '')
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    # Streamed responses are timed to their first byte; the URL rule keeps label cardinality bounded
+    if 'request_started' in g:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        observe_request(request.method, route, response.status_code, time.time() - g.request_started)
+    return response
+
+# Store AI analysis futures; partial results hold the sections finished so far
 ai_futures = {}
+ai_futures_condition = threading.Condition()
+AI_RESULT_SECTIONS = ('context_warnings', 'suggestions', 'fun_facts', 'climate_comparison')
+AI_STREAM_TIMEOUT_SECONDS = 120
+AI_STREAM_HEARTBEAT_SECONDS = 15
+# Each open stream holds a gthread worker thread for up to AI_STREAM_TIMEOUT_SECONDS; past this many
+# per process, clients get 503 and the dashboard polls instead, leaving threads for other requests
+AI_STREAM_MAX_CONCURRENT = int(os.getenv('AI_STREAM_MAX_CONCURRENT', '4'))
+ai_stream_slots = threading.BoundedSemaphore(AI_STREAM_MAX_CONCURRENT)
 
-# Initialize OpenAI client
-openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+def is_ai_analysis_complete(result):
+    """Completed analyses are marked with the ai_generated field"""
+    return isinstance(result, dict) and 'ai_generated' in result
 
 # Authentication configuration
 app.secret_key = os.getenv('SECRET_KEY', secrets.token_hex(32))
 SESSION_DURATION_HOURS = 24  # Sessions expire after 24 hours
 
+# Rate limits for AI endpoints: burst capacity, sustained requests per minute, concurrent jobs per client
+AI_RATE_LIMITS = {
+    'ai_analyze': {
+        'capacity': int(os.getenv('AI_ANALYZE_RATE_LIMIT_BURST', '5')),
+        'per_minute': float(os.getenv('AI_ANALYZE_RATE_LIMIT_PER_MINUTE', '5')),
+        'max_concurrent': int(os.getenv('AI_ANALYZE_MAX_CONCURRENT', '2'))
+    },
+    'chatbot': {
+        'capacity': int(os.getenv('CHATBOT_RATE_LIMIT_BURST', '20')),
+        'per_minute': float(os.getenv('CHATBOT_RATE_LIMIT_PER_MINUTE', '20')),
+        'max_concurrent': int(os.getenv('CHATBOT_MAX_CONCURRENT', '2'))
+    }
+}
+
 def get_db_connection():
     """Get database connection using Railway's DATABASE_URL"""
     database_url = os.getenv('DATABASE_URL')
-    print(f"DATABASE_URL environment variable: {database_url}")
     
     if not database_url:
-        print("ERROR: DATABASE_URL environment variable is not set!")
+        logger.error("DATABASE_URL environment variable is not set")
         return None
         
     try:
-        print("Attempting to connect to database...")
         conn = psycopg2.connect(
             database_url,
             cursor_factory=RealDictCursor,
             connect_timeout=10
         )
-        print("Database connection successful!")
         return conn
     except Exception as e:
-        print(f"Database connection error: {e}")
-        print(f"Error type: {type(e)}")
+        logger.error("Database connection error: %s", e)
         return None
 
+# Schema changes live in migrations/ and are applied by `python migrate.py` before gunicorn starts (railway.json)
+# Opt-in migration at import is for local runs only: under gunicorn it would run in every worker
+# and could outlast the worker boot timeout
+MIGRATE_ON_STARTUP = os.getenv('MIGRATE_ON_STARTUP', 'false').lower() == 'true'
+if MIGRATE_ON_STARTUP and os.getenv('DATABASE_URL'):
+    try:
+        run_migrations()
+    except Exception:
+        logger.exception("Database migration error")
+
+start_access_flusher(queries.touch_saved_locations)
+start_session_reaper(get_db_connection)
+
+register_check('database', queries.ping)
+start_health_checker()
+
 # Authentication utility functions
 def hash_password(password):
     """Hash a password using bcrypt"""
@@ -79,40 +160,25 @@ def validate_password(password):
 def get_user_by_session_token(session_token):
     """Get user by session token"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return None
-            
-        cursor = conn.cursor()
-        
-        # Get active session and user info
-        cursor.execute('''
-            SELECT u.id, u.username, u.email, u.created_at
-            FROM users u
-            JOIN user_sessions s ON u.id = s.user_id
-            WHERE s.session_token = %s 
-            AND s.is_active = TRUE 
-            AND s.expires_at > NOW()
-        ''', (session_token,))
-        
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
-        
-        return user
+        return queries.get_session_user(session_token)
         
     except Exception as e:
-        print(f"Error getting user by session token: {e}")
+        logger.error("Error getting user by session token: %s", e)
         return None
 
+def get_request_session_token():
+    """Get the session token from the Authorization header or the session cookie"""
+    session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    if not session_token:
+        session_token = request.cookies.get('session_token')
+    return session_token
+
 def require_auth(f):
     """Decorator to require authentication"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         # Get session token from request headers or cookies
-        session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        if not session_token:
-            session_token = request.cookies.get('session_token')
+        session_token = get_request_session_token()
         
         if not session_token:
             return jsonify({'error': 'Authentication required'}), 401
@@ -128,6 +194,61 @@ def require_auth(f):
     
     return decorated_function
 
+def get_rate_limit_identity():
+    """Identify the client for rate limiting: the session user when signed in, otherwise the IP"""
+    session_token = get_request_session_token()
+    if session_token:
+        user = get_user_by_session_token(session_token)
+        if user:
+            return f"user:{user.id}"
+    return f"ip:{request.remote_addr}"
+
+def limit_ai_requests(scope):
+    """
+    Decorator applying the scope's token-bucket rate limit and concurrent-job cap
+    The job slot is released when the view returns unless the view detaches g.ai_job_slot
+    """
+    limits = AI_RATE_LIMITS[scope]
+    
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if not RATE_LIMIT_ENABLED:
+                g.ai_job_slot = None
+                return f(*args, **kwargs)
+            
+            key = f"{scope}:{get_rate_limit_identity()}"
+            allowed, headers = check_rate_limit(key, limits['capacity'], limits['per_minute'])
+            if not allowed:
+                response = jsonify({'error': 'Rate limit exceeded. Please try again later.'})
+                response.headers.update(headers)
+                return response, 429
+            
+            slot = acquire_job_slot(key, limits['max_concurrent'])
+            if slot is None:
+                response = jsonify({'error': 'Too many requests in progress. Please wait for them to finish.'})
+                response.headers.update(headers)
+                response.headers['Retry-After'] = '1'
+                return response, 429
+            
+            g.ai_job_slot = slot
+            try:
+                response = make_response(f(*args, **kwargs))
+            finally:
+                if not slot.detached:
+                    slot.release()
+            response.headers.update(headers)
+            return response
+        
+        return decorated_function
+    
+    return decorator
+
+def detach_ai_job_slot():
+    """Take the request's job slot so it is held until released explicitly; returns None when limits are off"""
+    slot = g.get('ai_job_slot')
+    return slot.detach() if slot else None
+
 @app.route('/')
 def home():
     """Homepage - displays the weather dashboard"""
@@ -167,37 +288,35 @@ def register_user():
         if not validate_password(password):
             return jsonify({'error': 'Password must be at least 6 characters'}), 400
         
-        # Check if username or email already exists
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
         
         cursor = conn.cursor()
         
-        # Check username
-        cursor.execute('SELECT id FROM users WHERE username = %s', (username,))
-        if cursor.fetchone():
-            cursor.close()
-            conn.close()
-            return jsonify({'error': 'Username already exists'}), 409
-        
-        # Check email
-        cursor.execute('SELECT id FROM users WHERE email = %s', (email,))
-        if cursor.fetchone():
-            cursor.close()
-            conn.close()
-            return jsonify({'error': 'Email already exists'}), 409
-        
-        # Hash password and create user
+        # Hash password and create user; the unique constraints on username and email reject duplicates
         password_hash = hash_password(password)
         
         cursor.execute('''
-            INSERT INTO users (username, email, password_hash, created_at)
-            VALUES (%s, %s, %s, NOW())
+            INSERT INTO users (username, email, password_hash, created_at, last_login)
+            VALUES (%s, %s, %s, NOW(), NOW())
+            ON CONFLICT DO NOTHING
             RETURNING id, username, email, created_at
         ''', (username, email, password_hash))
         
         new_user = cursor.fetchone()
+        if not new_user:
+            # Only a rejected registration pays for the lookup that names the duplicate field
+            # bool_or over every matching row keeps the username message first when both fields are taken
+            cursor.execute('SELECT bool_or(username = %s) AS username_taken FROM users WHERE username = %s OR email = %s',
+                           (username, username, email))
+            existing = cursor.fetchone()
+            conn.rollback()
+            cursor.close()
+            conn.close()
+            if existing['username_taken'] is False:
+                return jsonify({'error': 'Email already exists'}), 409
+            return jsonify({'error': 'Username already exists'}), 409
         
         # Create session token
         session_token = generate_session_token()
@@ -208,11 +327,6 @@ def register_user():
             VALUES (%s, %s, %s)
         ''', (new_user['id'], session_token, expires_at))
         
-        # Update last login
-        cursor.execute('''
-            UPDATE users SET last_login = NOW() WHERE id = %s
-        ''', (new_user['id'],))
-        
         conn.commit()
         cursor.close()
         conn.close()
@@ -242,8 +356,8 @@ def register_user():
         
         return response
         
-    except Exception as e:
-        print(f"Registration error: {e}")
+    except Exception:
+        logger.exception("Registration error")
         return jsonify({'error': 'Registration failed'}), 500
 
 @app.route('/api/auth/login', methods=['POST'])
@@ -266,45 +380,36 @@ def login_user():
         username_or_email = username_or_email.lower() if is_email else username_or_email
         
         # Get user from database
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor()
-        
-        if is_email:
-            cursor.execute('SELECT id, username, email, password_hash, created_at FROM users WHERE email = %s AND is_active = TRUE', (username_or_email,))
-        else:
-            cursor.execute('SELECT id, username, email, password_hash, created_at FROM users WHERE username = %s AND is_active = TRUE', (username_or_email,))
-        
-        user = cursor.fetchone()
+        user = queries.get_login_user(username_or_email, is_email)
         
         if not user:
-            cursor.close()
-            conn.close()
             return jsonify({'error': 'Invalid username/email or password'}), 401
         
         # Verify password
-        if not verify_password(password, user['password_hash']):
-            cursor.close()
-            conn.close()
+        if not verify_password(password, user.password_hash):
             return jsonify({'error': 'Invalid username/email or password'}), 401
         
+        conn = get_db_connection()
+        if not conn:
+            return jsonify({'error': 'Database connection failed'}), 500
+        
+        cursor = conn.cursor()
+        
         # Create new session token
         session_token = generate_session_token()
         expires_at = datetime.now() + timedelta(hours=SESSION_DURATION_HOURS)
         
         # Deactivate old sessions for this user
-        cursor.execute('UPDATE user_sessions SET is_active = FALSE WHERE user_id = %s', (user['id'],))
+        cursor.execute('UPDATE user_sessions SET is_active = FALSE WHERE user_id = %s', (user.id,))
         
         # Create new session
         cursor.execute('''
             INSERT INTO user_sessions (user_id, session_token, expires_at)
             VALUES (%s, %s, %s)
-        ''', (user['id'], session_token, expires_at))
+        ''', (user.id, session_token, expires_at))
         
         # Update last login
-        cursor.execute('UPDATE users SET last_login = NOW() WHERE id = %s', (user['id'],))
+        cursor.execute('UPDATE users SET last_login = NOW() WHERE id = %s', (user.id,))
         
         conn.commit()
         cursor.close()
@@ -315,10 +420,10 @@ def login_user():
             'success': True,
             'message': 'Login successful',
             'user': {
-                'id': user['id'],
-                'username': user['username'],
-                'email': user['email'],
-                'created_at': user['created_at'].isoformat()
+                'id': user.id,
+                'username': user.username,
+                'email': user.email,
+                'created_at': user.created_at.isoformat()
             },
             'session_token': session_token
         })
@@ -335,8 +440,8 @@ def login_user():
         
         return response
         
-    except Exception as e:
-        print(f"Login error: {e}")
+    except Exception:
+        logger.exception("Login error")
         return jsonify({'error': 'Login failed'}), 500
 
 @app.route('/api/auth/logout', methods=['POST'])
@@ -344,9 +449,7 @@ def logout_user():
     """Logout user and invalidate session"""
     try:
         # Get session token from request
-        session_token = request.headers.get('Authorization', '').replace('Bearer ', '')
-        if not session_token:
-            session_token = request.cookies.get('session_token')
+        session_token = get_request_session_token()
         
         if session_token:
             # Invalidate session in database
@@ -369,8 +472,8 @@ def logout_user():
         
         return response
         
-    except Exception as e:
-        print(f"Logout error: {e}")
+    except Exception:
+        logger.exception("Logout error")
         return jsonify({'error': 'Logout failed'}), 500
 
 @app.route('/api/auth/me', methods=['GET'])
@@ -380,55 +483,108 @@ def get_current_user():
     return jsonify({
         'success': True,
         'user': {
-            'id': request.current_user['id'],
-            'username': request.current_user['username'],
-            'email': request.current_user['email'],
-            'created_at': request.current_user['created_at'].isoformat()
+            'id': request.current_user.id,
+            'username': request.current_user.username,
+            'email': request.current_user.email,
+            'created_at': request.current_user.created_at.isoformat()
         }
     })
 
+def saved_location_json(loc):
+    """Serialize a saved_locations row"""
+    return {
+        'id': loc.id,
+        'name': loc.name,
+        'lat': float(loc.lat),
+        'lon': float(loc.lon),
+        'state': loc.state,
+        'country': loc.country,
+        'display_name': loc.display_name,
+        'created_at': loc.created_at.isoformat(),
+        'last_accessed': loc.last_accessed.isoformat()
+    }
+
 @app.route('/api/locations/saved', methods=['GET'])
 @require_auth
 def get_saved_locations():
     """Get all saved locations for the current user"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
+        locations = queries.list_saved_locations(request.current_user.id)
         
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, name, lat, lon, state, country, display_name, created_at, last_accessed
-            FROM saved_locations 
-            WHERE user_id = %s 
-            ORDER BY last_accessed DESC
-        ''', (request.current_user['id'],))
+        return jsonify({
+            'success': True,
+            'locations': [saved_location_json(loc) for loc in locations]
+        })
         
-        locations = cursor.fetchall()
-        cursor.close()
-        conn.close()
+    except Exception:
+        logger.exception("Error getting saved locations")
+        return jsonify({'error': 'Failed to get saved locations'}), 500
+
+def summarize_conditions(weather_data):
+    """Compact current conditions and today's outlook for list views"""
+    current = weather_data['current']
+    today = (weather_data['forecast']['daily'] or [{}])[0]
+    condition = (current.get('weather') or [{}])[0]
+    return {
+        'temp': round(current['main']['temp']),
+        'description': condition.get('description', ''),
+        'icon': condition.get('icon', ''),
+        'high': round(today['temp']['max']) if 'temp' in today else None,
+        'low': round(today['temp']['min']) if 'temp' in today else None,
+        'pop': round(today.get('pop', 0) * 100)
+    }
+
+# Uncached saved locations the overview fetches upstream per request, most recently accessed first
+# Those fetches are also charged to the same per-client budget as /api/weather/batch
+SAVED_OVERVIEW_MAX_FETCHES = int(os.getenv('SAVED_OVERVIEW_MAX_FETCHES', '5'))
+
+@app.route('/api/locations/saved/overview', methods=['GET'])
+@require_auth
+def get_saved_locations_overview():
+    """Get the current user's saved locations, each with a current-conditions summary"""
+    try:
+        locations = queries.list_saved_locations(request.current_user.id)
+        coords = [(float(loc.lat), float(loc.lon)) for loc in locations]
+        
+        # Cached forecasts cost nothing; a bounded number of the rest are fetched concurrently
+        now = time.time()
+        uncached = []
+        for lat, lon in coords:
+            key = make_location_key(lat, lon)
+            if (get_forecast_expiry(lat, lon) or 0) <= now and key not in uncached:
+                uncached.append(key)
+        to_fetch = uncached[:SAVED_OVERVIEW_MAX_FETCHES]
+        if to_fetch and RATE_LIMIT_ENABLED:
+            allowed, _ = check_rate_limit(
+                f"weather_batch:user:{request.current_user.id}",
+                WEATHER_BATCH_RATE_LIMIT_BURST,
+                WEATHER_BATCH_RATE_LIMIT_PER_MINUTE,
+                cost=len(to_fetch)
+            )
+            if not allowed:
+                to_fetch = []
+        skipped = set(uncached) - set(to_fetch)
+        
+        weather, errors = fetch_weather_for_locations([(lat, lon) for lat, lon in coords if make_location_key(lat, lon) not in skipped])
+        for key in skipped:
+            errors[key] = 'Conditions not loaded yet; open the location to refresh them'
+        
+        overview = []
+        for loc in locations:
+            key = make_location_key(loc.lat, loc.lon)
+            overview.append(dict(
+                saved_location_json(loc),
+                conditions=summarize_conditions(weather[key]) if key in weather else None,
+                conditions_error=errors.get(key)
+            ))
         
         return jsonify({
             'success': True,
-            'locations': [
-                {
-                    'id': loc['id'],
-                    'name': loc['name'],
-                    'lat': float(loc['lat']),
-                    'lon': float(loc['lon']),
-                    'state': loc['state'],
-                    'country': loc['country'],
-                    'display_name': loc['display_name'],
-                    'created_at': loc['created_at'].isoformat(),
-                    'last_accessed': loc['last_accessed'].isoformat()
-                }
-                for loc in locations
-            ]
+            'locations': overview
         })
         
-    except Exception as e:
-        print(f"Error getting saved locations: {e}")
+    except Exception:
+        logger.exception("Error getting saved locations overview")
         return jsonify({'error': 'Failed to get saved locations'}), 500
 
 @app.route('/api/locations/save', methods=['POST'])
@@ -460,54 +616,19 @@ def save_location():
                 display_parts.append(country)
             display_name = ', '.join(display_parts)
         
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor()
-        
-        # Check if location already exists for this user
-        cursor.execute('''
-            SELECT id FROM saved_locations 
-            WHERE user_id = %s AND lat = %s AND lon = %s
-        ''', (request.current_user['id'], lat, lon))
-        
-        existing = cursor.fetchone()
-        if existing:
-            cursor.close()
-            conn.close()
+        # Save the location; nothing is returned if the user already saved it
+        new_location = queries.insert_saved_location(request.current_user.id, name, lat, lon, state, country, display_name)
+        if not new_location:
             return jsonify({'error': 'Location already saved'}), 409
         
-        # Save the location
-        cursor.execute('''
-            INSERT INTO saved_locations (user_id, name, lat, lon, state, country, display_name, created_at, last_accessed)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, NOW(), NOW())
-            RETURNING id, name, lat, lon, state, country, display_name, created_at, last_accessed
-        ''', (request.current_user['id'], name, lat, lon, state, country, display_name))
-        
-        new_location = cursor.fetchone()
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
         return jsonify({
             'success': True,
             'message': 'Location saved successfully',
-            'location': {
-                'id': new_location['id'],
-                'name': new_location['name'],
-                'lat': float(new_location['lat']),
-                'lon': float(new_location['lon']),
-                'state': new_location['state'],
-                'country': new_location['country'],
-                'display_name': new_location['display_name'],
-                'created_at': new_location['created_at'].isoformat(),
-                'last_accessed': new_location['last_accessed'].isoformat()
-            }
+            'location': saved_location_json(new_location)
         })
         
-    except Exception as e:
-        print(f"Error saving location: {e}")
+    except Exception:
+        logger.exception("Error saving location")
         return jsonify({'error': 'Failed to save location'}), 500
 
 @app.route('/api/locations/<int:location_id>', methods=['DELETE'])
@@ -515,200 +636,114 @@ def save_location():
 def delete_saved_location(location_id):
     """Delete a saved location for the current user"""
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor()
-        
-        # Check if location exists and belongs to user
-        cursor.execute('''
-            SELECT id FROM saved_locations 
-            WHERE id = %s AND user_id = %s
-        ''', (location_id, request.current_user['id']))
-        
-        location = cursor.fetchone()
-        if not location:
-            cursor.close()
-            conn.close()
+        # Delete the location if it exists and belongs to the user
+        if not queries.delete_saved_location(location_id, request.current_user.id):
             return jsonify({'error': 'Location not found'}), 404
         
-        # Delete the location
-        cursor.execute('''
-            DELETE FROM saved_locations 
-            WHERE id = %s AND user_id = %s
-        ''', (location_id, request.current_user['id']))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
         return jsonify({
             'success': True,
             'message': 'Location deleted successfully'
         })
         
-    except Exception as e:
-        print(f"Error deleting location: {e}")
+    except Exception:
+        logger.exception("Error deleting location")
         return jsonify({'error': 'Failed to delete location'}), 500
 
 @app.route('/api/locations/<int:location_id>/access', methods=['POST'])
 @require_auth
 def update_location_access(location_id):
-    """Update the last accessed time for a saved location"""
-    try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = conn.cursor()
-        
-        # Check if location exists and belongs to user
-        cursor.execute('''
-            SELECT id FROM saved_locations 
-            WHERE id = %s AND user_id = %s
-        ''', (location_id, request.current_user['id']))
-        
-        location = cursor.fetchone()
-        if not location:
-            cursor.close()
-            conn.close()
-            return jsonify({'error': 'Location not found'}), 404
-        
-        # Update last accessed time
-        cursor.execute('''
-            UPDATE saved_locations 
-            SET last_accessed = NOW() 
-            WHERE id = %s AND user_id = %s
-        ''', (location_id, request.current_user['id']))
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'message': 'Location access updated'
-        })
-        
-    except Exception as e:
-        print(f"Error updating location access: {e}")
-        return jsonify({'error': 'Failed to update location access'}), 500
+    """Record that a saved location was opened; last_accessed is written in the next batched flush"""
+    record_access(location_id, request.current_user.id)
+    return jsonify({
+        'success': True,
+        'message': 'Location access recorded'
+    }), 202
+
+# Liveness and readiness are separate: the platform healthcheck must not touch dependencies
+APP_STARTED_AT = time.time()
 
 @app.route('/api/health')
 def health_check():
-    # Test the database connection
-    db_status = 'disconnected'
-    try:
-        conn = get_db_connection()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT 1;')
-            cursor.fetchone()
-            cursor.close()
-            conn.close()
-            db_status = 'connected'
-    except Exception as e:
-        print(f"Health check db error: {e}")
-    
+    """Liveness: the process is up and serving requests; no I/O"""
     return jsonify({
-        'status': 'healthy', 
+        'status': 'healthy',
         'service': 'stratus-api',
-        'database': db_status
+        'uptime_seconds': round(time.time() - APP_STARTED_AT)
     })
 
-@app.route('/api/init-db')
-def init_database():
-    """Initialize database with basic schema"""
+@app.route('/api/health/ready')
+def readiness_check():
+    """Readiness and deep health from cached dependency checks, breaker states and cache stats"""
+    dependencies, ready = get_dependency_status()
+    breakers = get_breaker_states()
+    # Upstream APIs are judged by their circuit breakers rather than by extra paid probe calls
+    for name, breaker in breakers.items():
+        dependencies[name] = {
+            'ok': breaker['state'] != 'open',
+            'state': breaker['state'],
+            'last_success_at': breaker['last_success_at'],
+            'last_failure_at': breaker['last_failure_at']
+        }
+    
+    return jsonify({
+        'status': 'ready' if ready else 'not_ready',
+        'service': 'stratus-api',
+        'dependencies': dependencies,
+        'database_pool': queries.get_pool_stats(),
+        'forecast_cache': get_forecast_cache_stats(),
+        'chatbot_answer_cache': get_answer_cache_stats(),
+        'chatbot_intent_router': get_intent_router_stats(),
+        'ai_router': get_ai_router_stats(),
+        'ai_structured_output': get_structured_output_stats(),
+        'forecast_prompt_tokens': get_forecast_prompt_token_stats(),
+        'circuit_breakers': breakers,
+        'cache_warmer': get_cache_warmer_stats(),
+        'location_access_updates': get_access_tracker_stats(),
+        'session_reaper': get_session_reaper_stats()
+    }), 200 if ready else 503
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus scrape endpoint; summed over every worker when running under gunicorn"""
+    if not METRICS_ENABLED:
+        return jsonify({'error': 'Metrics are not enabled'}), 404
+    if METRICS_TOKEN and not secrets.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+        return jsonify({'error': 'Authentication required'}), 401
+    body, content_type = render_metrics()
+    return Response(body, content_type=content_type)
+
+# Circuit breakers for the OpenWeather APIs; OpenAI's breaker lives in ai_router
+OPENWEATHER_SLOW_CALL_SECONDS = float(os.getenv('OPENWEATHER_SLOW_CALL_SECONDS', '5'))
+onecall_breaker = get_breaker('openweather_onecall', slow_call_seconds=OPENWEATHER_SLOW_CALL_SECONDS)
+geocoding_breaker = get_breaker('openweather_geocoding', slow_call_seconds=OPENWEATHER_SLOW_CALL_SECONDS)
+
+def get_with_breaker(breaker, url, dependency, timeout=10):
+    """
+    GET an upstream URL through a circuit breaker; raises CircuitOpenError while it is open
+    dependency names the calling function in logs and metrics
+    """
+    if not breaker.allow_request():
+        raise CircuitOpenError(f"{breaker.name} is unavailable (circuit open)")
+    
+    started = time.time()
     try:
-        conn = get_db_connection()
-        if not conn:
-            return jsonify({'error': 'Could not connect to database'}), 500
-            
-        cursor = conn.cursor()
-        
-        # Create locations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS locations (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                lat DECIMAL(10, 8) NOT NULL,
-                lon DECIMAL(11, 8) NOT NULL,
-                country VARCHAR(100),
-                state VARCHAR(100),
-                created_at TIMESTAMP DEFAULT NOW(),
-                UNIQUE(lat, lon)
-            );
-        ''')
-        
-        # Create weather forecasts table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS weather_forecasts (
-                id SERIAL PRIMARY KEY,
-                location_id INTEGER REFERENCES locations(id),
-                forecast_date DATE NOT NULL,
-                weather_data JSONB NOT NULL,
-                created_at TIMESTAMP DEFAULT NOW()
-            );
-        ''')
-        
-        # Create users table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT NOW(),
-                last_login TIMESTAMP,
-                is_active BOOLEAN DEFAULT TRUE
-            );
-        ''')
-        
-        # Create saved locations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS saved_locations (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-                name VARCHAR(255) NOT NULL,
-                lat DECIMAL(10, 8) NOT NULL,
-                lon DECIMAL(11, 8) NOT NULL,
-                state VARCHAR(100),
-                country VARCHAR(100),
-                display_name VARCHAR(255),
-                created_at TIMESTAMP DEFAULT NOW(),
-                last_accessed TIMESTAMP DEFAULT NOW(),
-                UNIQUE(user_id, lat, lon)
-            );
-        ''')
-        
-        # Create user sessions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_sessions (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-                session_token VARCHAR(255) UNIQUE NOT NULL,
-                created_at TIMESTAMP DEFAULT NOW(),
-                expires_at TIMESTAMP NOT NULL,
-                is_active BOOLEAN DEFAULT TRUE
-            );
-        ''')
-        
-        # Create indexes for better performance
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_saved_locations_user_id ON saved_locations(user_id);')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_sessions_token ON user_sessions(session_token);')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_user_sessions_user_id ON user_sessions(user_id);')
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
-        
-        return jsonify({'message': 'Database initialized successfully with user tables'})
-        
-    except Exception as e:
-        return jsonify({'error': f'Database initialization failed: {str(e)}'}), 500
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        duration = time.time() - started
+        status_code = e.response.status_code if e.response is not None else None
+        breaker.record_error(status_code, duration)
+        observe_upstream(dependency, duration, error=True)
+        # The URL carries the API key, so only the status is logged
+        status = status_code if status_code is not None else type(e).__name__
+        logger.warning("Upstream call failed", extra={'dependency': dependency, 'breaker': breaker.name, 'status': status, 'duration_ms': round(duration * 1000)})
+        raise
+    
+    duration = time.time() - started
+    breaker.record_success(duration)
+    observe_upstream(dependency, duration)
+    logger.info("Upstream call", extra={'dependency': dependency, 'breaker': breaker.name, 'status': response.status_code, 'duration_ms': round(duration * 1000)})
+    return response
 
 def get_location_coords(city, state=None, country='US'):
     """Get coordinates for a city using OpenWeatherMap Geocoding API"""
@@ -728,8 +763,7 @@ def get_location_coords(city, state=None, country='US'):
         
         url = f"http://api.openweathermap.org/geo/1.0/direct?q={query}&limit=1&appid={api_key}"
         
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        response = get_with_breaker(geocoding_breaker, url, 'get_location_coords')
         
         data = response.json()
         
@@ -745,6 +779,8 @@ def get_location_coords(city, state=None, country='US'):
             'country': location.get('country', country)
         }, None
         
+    except CircuitOpenError as e:
+        return None, str(e)
     except requests.exceptions.RequestException as e:
         return None, f"Network error: {str(e)}"
     except Exception as e:
@@ -759,8 +795,7 @@ def get_location_from_coords(lat, lon):
         
         url = f"http://api.openweathermap.org/geo/1.0/reverse?lat={lat}&lon={lon}&limit=1&appid={api_key}"
         
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        response = get_with_breaker(geocoding_breaker, url, 'get_location_from_coords')
         
         data = response.json()
         
@@ -776,25 +811,40 @@ def get_location_from_coords(lat, lon):
             'country': location.get('country', '')
         }, None
         
+    except CircuitOpenError as e:
+        return None, str(e)
     except requests.exceptions.RequestException as e:
         return None, f"Network error: {str(e)}"
     except Exception as e:
         return None, f"Error getting location: {str(e)}"
 
-def fetch_weather_data(lat, lon):
-    """Fetch all weather data using One Call API 3.0"""
+def fetch_weather_data(lat, lon, refresh=False):
+    """
+    Fetch all weather data using One Call API 3.0, served from the forecast cache when fresh
+    refresh skips the cache and always calls upstream (used by the cache warmer)
+    """
     try:
+        cached = None if refresh else get_cached_forecast(lat, lon)
+        if cached:
+            return cached['data'], None
+        
         api_key = os.getenv('OPENWEATHER_API_KEY')
         if not api_key:
             return None, "OpenWeatherMap API key not found"
         
         url = f"https://api.openweathermap.org/data/3.0/onecall?lat={lat}&lon={lon}&appid={api_key}&units=imperial&exclude=minutely"
         
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        try:
+            response = get_with_breaker(onecall_breaker, url, 'fetch_weather_data')
+        except (CircuitOpenError, requests.exceptions.RequestException) as e:
+            # Serve the last known forecast rather than failing while the service is down
+            stale = None if refresh else get_cached_forecast(lat, lon, allow_stale=True)
+            if stale:
+                logger.warning("Serving stale forecast for %s: %s", stale['location_key'], e)
+                return stale['data'], None
+            raise
         
         data = response.json()
-        print(f"One Call API response: {data}")  # Debug
         
         # Process the data to match our expected format
         current_weather = {
@@ -849,16 +899,65 @@ def fetch_weather_data(lat, lon):
             'daily': daily_forecasts
         }
         
-        return {
+        entry = store_forecast(lat, lon, {
             'current': current_weather,
-            'forecast': forecast_data
-        }, None
+            'forecast': forecast_data,
+            'timezone_offset': data.get('timezone_offset', 0)
+        })
+        return entry['data'], None
         
+    except CircuitOpenError:
+        return None, "Weather service is temporarily unavailable"
     except requests.exceptions.RequestException as e:
         return None, f"Network error: {str(e)}"
     except Exception as e:
         return None, f"Error fetching weather data: {str(e)}"
 
+# Upstream fetches for multi-location requests share one small pool, bounding One Call concurrency
+WEATHER_BATCH_MAX_LOCATIONS = int(os.getenv('WEATHER_BATCH_MAX_LOCATIONS', '25'))
+WEATHER_BATCH_MAX_CONCURRENCY = int(os.getenv('WEATHER_BATCH_MAX_CONCURRENCY', '4'))
+# Uncached locations a client may fetch through the batch endpoint: burst capacity and sustained per minute
+# The burst must be at least WEATHER_BATCH_MAX_LOCATIONS or a full batch of misses is never allowed
+WEATHER_BATCH_RATE_LIMIT_BURST = int(os.getenv('WEATHER_BATCH_RATE_LIMIT_BURST', str(WEATHER_BATCH_MAX_LOCATIONS)))
+WEATHER_BATCH_RATE_LIMIT_PER_MINUTE = float(os.getenv('WEATHER_BATCH_RATE_LIMIT_PER_MINUTE', '25'))
+weather_batch_executor = ThreadPoolExecutor(max_workers=WEATHER_BATCH_MAX_CONCURRENCY, thread_name_prefix='weather-batch')
+
+def fetch_weather_for_locations(coords):
+    """
+    Resolve many (lat, lon) pairs through the forecast cache, fetching misses concurrently
+    Returns (results, errors), both keyed by forecast cache location key
+    """
+    results = {}
+    errors = {}
+    misses = {}
+    for lat, lon in coords:
+        key = make_location_key(lat, lon)
+        if key in results or key in misses:
+            continue
+        cached = get_cached_forecast(lat, lon)
+        if cached:
+            results[key] = cached['data']
+        else:
+            misses[key] = weather_batch_executor.submit(in_current_context(fetch_weather_data), lat, lon)
+    
+    for key, future in misses.items():
+        weather_data, error = future.result()
+        if error:
+            errors[key] = error
+        else:
+            results[key] = weather_data
+    return results, errors
+
+def parse_coordinates(lat, lon):
+    """Parse and range-check a latitude/longitude pair, or return None"""
+    try:
+        lat, lon = float(lat), float(lon)
+    except (TypeError, ValueError):
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lat, lon
+
 @app.route('/api/weather/coords')
 def get_weather_by_coords():
     """Get weather data for specific coordinates"""
@@ -870,11 +969,13 @@ def get_weather_by_coords():
         
         if not lat or not lon:
             return jsonify({'error': 'Latitude and longitude are required'}), 400
+        if parse_coordinates(lat, lon) is None:
+            return jsonify({'error': 'Latitude must be between -90 and 90 and longitude between -180 and 180'}), 400
         
         # Obtain location name
         location, error = get_location_from_coords(lat, lon)
         if error:
-            print(f"Location lookup error: {error}")
+            logger.info("Location lookup error: %s", error)
             location = {
                 'name': f'Location ({lat}, {lon})',
                 'lat': float(lat),
@@ -893,6 +994,7 @@ def get_weather_by_coords():
             'location': location,
             'current': weather_data['current'],
             'forecast': weather_data['forecast'],
+            'forecast_id': weather_data['forecast_id'],
             'fetched_at': datetime.now().isoformat()
         }
         
@@ -920,8 +1022,7 @@ def search_locations():
         
         url = f"http://api.openweathermap.org/geo/1.0/direct?q={query}&limit=5&appid={api_key}"
         
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        response = get_with_breaker(geocoding_breaker, url, 'search_locations')
         
         locations = response.json()
         
@@ -941,6 +1042,8 @@ def search_locations():
             'locations': formatted_locations
         })
         
+    except CircuitOpenError:
+        return jsonify({'error': 'Location search is temporarily unavailable'}), 503
     except requests.exceptions.RequestException as e:
         return jsonify({'error': f'Network error: {str(e)}'}), 500
     except Exception as e:
@@ -957,11 +1060,13 @@ def get_weather_by_location():
         
         if not lat or not lon:
             return jsonify({'error': 'Latitude and longitude are required'}), 400
+        if parse_coordinates(lat, lon) is None:
+            return jsonify({'error': 'Latitude must be between -90 and 90 and longitude between -180 and 180'}), 400
         
         # Get location name
         location, error = get_location_from_coords(lat, lon)
         if error:
-            print(f"Location lookup error: {error}")
+            logger.info("Location lookup error: %s", error)
             location = {
                 'name': f'Location ({lat}, {lon})',
                 'lat': float(lat),
@@ -980,6 +1085,7 @@ def get_weather_by_location():
             'location': location,
             'current': weather_data['current'],
             'forecast': weather_data['forecast'],
+            'forecast_id': weather_data['forecast_id'],
             'fetched_at': datetime.now().isoformat()
         }
         
@@ -1016,6 +1122,7 @@ def get_weather_by_search():
             'location': location,
             'current': weather_data['current'],
             'forecast': weather_data['forecast'],
+            'forecast_id': weather_data['forecast_id'],
             'fetched_at': datetime.now().isoformat()
         }
         
@@ -1027,7 +1134,66 @@ def get_weather_by_search():
     except Exception as e:
         return jsonify({'error': f'Failed to fetch weather: {str(e)}'}), 500
 
+@app.route('/api/weather/batch', methods=['POST'])
+def get_weather_batch():
+    """Get weather for many coordinates in one request, with per-location errors"""
+    try:
+        data = request.get_json(silent=True)
+        locations = data.get('locations') if isinstance(data, dict) else None
+        if not isinstance(locations, list) or not locations:
+            return jsonify({'error': 'A list of locations with lat and lon is required'}), 400
+        if len(locations) > WEATHER_BATCH_MAX_LOCATIONS:
+            return jsonify({'error': f'At most {WEATHER_BATCH_MAX_LOCATIONS} locations per request'}), 400
+        
+        coords = []
+        for index, location in enumerate(locations):
+            parsed = parse_coordinates(location.get('lat'), location.get('lon')) if isinstance(location, dict) else None
+            if parsed is None:
+                return jsonify({'error': f'Location {index} needs a valid lat and lon'}), 400
+            coords.append(parsed)
+        
+        # Each uncached location costs a One Call request, so misses are charged rather than requests
+        headers = {}
+        if RATE_LIMIT_ENABLED:
+            now = time.time()
+            uncached = {make_location_key(lat, lon) for lat, lon in coords if (get_forecast_expiry(lat, lon) or 0) <= now}
+            if uncached:
+                allowed, headers = check_rate_limit(
+                    f"weather_batch:{get_rate_limit_identity()}",
+                    WEATHER_BATCH_RATE_LIMIT_BURST,
+                    WEATHER_BATCH_RATE_LIMIT_PER_MINUTE,
+                    cost=len(uncached)
+                )
+                if not allowed:
+                    response = jsonify({'error': 'Rate limit exceeded for uncached locations. Please try again later.'})
+                    response.headers.update(headers)
+                    return response, 429
+        
+        results, errors = fetch_weather_for_locations(coords)
+        
+        response = jsonify({
+            'success': True,
+            'results': {
+                key: {
+                    'current': weather_data['current'],
+                    'forecast': weather_data['forecast'],
+                    'forecast_id': weather_data['forecast_id']
+                }
+                for key, weather_data in results.items()
+            },
+            'errors': errors,
+            # Result key for each requested location, in request order (nearby points share a key)
+            'keys': [make_location_key(lat, lon) for lat, lon in coords],
+            'fetched_at': datetime.now().isoformat()
+        })
+        response.headers.update(headers)
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': f'Failed to fetch weather: {str(e)}'}), 500
+
 @app.route('/api/ai/analyze')
+@limit_ai_requests('ai_analyze')
 def analyze_weather_with_ai():
     """Get AI-powered weather analysis - starts async analysis"""
     try:
@@ -1039,13 +1205,12 @@ def analyze_weather_with_ai():
         target_lat = request.args.get('target_lat')
         target_lon = request.args.get('target_lon')
         
-        print(f"AI analyze called with: user_lat={user_lat}, user_lon={user_lon}, target_lat={target_lat}, target_lon={target_lon}")
+        logger.debug("AI analyze called", extra={'user_lat': user_lat, 'user_lon': user_lon, 'target_lat': target_lat, 'target_lon': target_lon})
         
         if not all([user_lat, user_lon, target_lat, target_lon]):
             return jsonify({'error': 'All coordinates are required'}), 400
         
         # Get user location name
-        print(f"Getting user location from coords: {user_lat}, {user_lon}")
         user_location, _ = get_location_from_coords(float(user_lat), float(user_lon))
         if not user_location:
             user_location = {
@@ -1055,10 +1220,8 @@ def analyze_weather_with_ai():
                 'state': '',
                 'country': ''
             }
-        print(f"User location: {user_location}")
         
         # Get target location name
-        print(f"Getting target location from coords: {target_lat}, {target_lon}")
         target_location, _ = get_location_from_coords(float(target_lat), float(target_lon))
         if not target_location:
             target_location = {
@@ -1068,51 +1231,40 @@ def analyze_weather_with_ai():
                 'state': '',
                 'country': ''
             }
-        print(f"Target location: {target_location}")
         
         # Get weather data for target location
-        print(f"Fetching weather data for target location...")
         weather_data, error = fetch_weather_data(target_lat, target_lon)
         if error:
-            print(f"Weather data error: {error}")
+            logger.warning("AI analyze weather data error: %s", error)
             return jsonify({'error': error}), 500
         
-        # Extract current and forecast from the weather data
-        current_weather = weather_data['current']
-        forecast = weather_data['forecast']
-        print(f"Weather data structure: current={bool(current_weather)}, forecast={bool(forecast)}")
+        # Register the analysis before starting it so pollers and streams can find it
+        analysis_id = f"{user_lat}_{user_lon}_{target_lat}_{target_lon}_{int(time.time())}"
+        with ai_futures_condition:
+            ai_futures[analysis_id] = {}
         
-        # Start async AI analysis
-        print(f"Starting async AI analysis...")
-        ai_analysis = get_comprehensive_ai_analysis_async(user_location, target_location, weather_data)
+        def store_section(name, value):
+            with ai_futures_condition:
+                if analysis_id in ai_futures:
+                    ai_futures[analysis_id][name] = value
+                ai_futures_condition.notify_all()
         
-        # Store the future for later retrieval (don't include in response)
-        analysis_id = f"{user_lat}_{user_lon}_{target_lat}_{target_lon}_{int(time.time())}"
+        # The client's job slot stays held until the background analysis finishes
+        job_slot = detach_ai_job_slot()
         
-        # Start the actual AI analysis in background
-        def run_ai_analysis():
-            try:
-                print(f"Running AI analysis in background for {analysis_id}")
-                result = get_comprehensive_ai_analysis(user_location, target_location, weather_data)
+        def store_result(result):
+            with ai_futures_condition:
                 ai_futures[analysis_id] = result
-                print(f"AI analysis completed for {analysis_id}")
-            except Exception as e:
-                print(f"Background AI analysis error: {e}")
-                ai_futures[analysis_id] = {
-                    "context_warnings": [],
-                    "suggestions": ["AI analysis failed"],
-                    "fun_facts": ["Unable to generate insights"],
-                    "climate_comparison": "Analysis unavailable",
-                    "ai_generated": False,
-                    "error": str(e),
-                    "timestamp": datetime.now().isoformat()
-                }
-        
-        # Start background thread
-        import threading
-        thread = threading.Thread(target=run_ai_analysis)
-        thread.daemon = True
-        thread.start()
+                ai_futures_condition.notify_all()
+            if job_slot:
+                job_slot.release()
+            logger.info("AI analysis completed for %s", analysis_id)
+        
+        # Start async AI analysis; sections are published as they complete
+        ai_analysis = get_comprehensive_ai_analysis_async(
+            user_location, target_location, weather_data,
+            on_section=store_section, on_complete=store_result
+        )
         
         return jsonify({
             'success': True,
@@ -1124,24 +1276,28 @@ def analyze_weather_with_ai():
         })
         
     except Exception as e:
-        print(f"AI analyze endpoint error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("AI analyze endpoint error")
         return jsonify({'error': f'AI analysis failed: {str(e)}'}), 500
 
 @app.route('/api/ai/result/<analysis_id>')
 def get_ai_analysis_result(analysis_id):
     """Get the result of an async AI analysis"""
     try:
-        if analysis_id not in ai_futures:
-            return jsonify({'error': 'Analysis ID not found'}), 404
-        
-        result = ai_futures[analysis_id]
-        
-        # Check if analysis is complete (has ai_generated field)
-        if isinstance(result, dict) and 'ai_generated' in result:
-            # Analysis is complete, clean up
-            completed_result = ai_futures.pop(analysis_id)
+        with ai_futures_condition:
+            if analysis_id not in ai_futures:
+                return jsonify({'error': 'Analysis ID not found'}), 404
+            
+            result = ai_futures[analysis_id]
+            
+            # Check if analysis is complete (has ai_generated field)
+            if is_ai_analysis_complete(result):
+                # Analysis is complete, clean up
+                completed_result = ai_futures.pop(analysis_id)
+            else:
+                completed_result = None
+                sections = dict(result)
+        
+        if completed_result is not None:
             return jsonify({
                 'success': True,
                 'result': completed_result,
@@ -1151,13 +1307,79 @@ def get_ai_analysis_result(analysis_id):
             return jsonify({
                 'success': True,
                 'completed': False,
+                'sections': sections,
                 'message': 'Analysis still in progress'
             })
             
     except Exception as e:
-        print(f"AI result endpoint error: {e}")
+        logger.exception("AI result endpoint error")
         return jsonify({'error': f'Failed to get AI result: {str(e)}'}), 500
 
+def format_sse(event, data):
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/api/ai/stream/<analysis_id>')
+def stream_ai_analysis_result(analysis_id):
+    """Stream the sections of an async AI analysis as Server-Sent Events"""
+    with ai_futures_condition:
+        if analysis_id not in ai_futures:
+            return jsonify({'error': 'Analysis ID not found'}), 404
+    
+    if not ai_stream_slots.acquire(blocking=False):
+        response = jsonify({'error': 'Too many open streams, poll /api/ai/result instead'})
+        response.headers['Retry-After'] = '2'
+        return response, 503
+    
+    def generate():
+        sent = set()
+        deadline = time.time() + AI_STREAM_TIMEOUT_SECONDS
+        
+        while True:
+            idle = False
+            with ai_futures_condition:
+                result = ai_futures.get(analysis_id)
+                completed = result is not None and is_ai_analysis_complete(result)
+                if completed:
+                    ai_futures.pop(analysis_id, None)
+                elif result is not None and all(name in sent for name in result):
+                    # Nothing new yet; sleep until a section lands or the heartbeat is due
+                    remaining = deadline - time.time()
+                    if remaining > 0:
+                        idle = not ai_futures_condition.wait(min(remaining, AI_STREAM_HEARTBEAT_SECONDS))
+                    result = ai_futures.get(analysis_id)
+                    completed = False
+                result = dict(result) if result is not None else None
+            
+            # Yield outside the lock so slow clients never block the analysis thread
+            if result is None:
+                yield format_sse('error', {'error': 'Analysis ID not found'})
+                return
+            
+            for name in AI_RESULT_SECTIONS:
+                if name not in sent and name in result:
+                    sent.add(name)
+                    yield format_sse('section', {'section': name, 'value': result[name]})
+            
+            if completed:
+                yield format_sse('complete', result)
+                return
+            
+            if time.time() >= deadline:
+                yield format_sse('timeout', {'message': 'Analysis still in progress'})
+                return
+            
+            if idle:
+                # Comment line keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    # Released when the server closes the response, including when the client disconnects
+    response.call_on_close(ai_stream_slots.release)
+    return response
+
 @app.route('/api/weather/stlouis')
 def get_stlouis_weather():
     """Get current weather and 5-day forecast for St. Louis, MO"""
@@ -1177,6 +1399,7 @@ def get_stlouis_weather():
             'location': location,
             'current': weather_data['current'],
             'forecast': weather_data['forecast'],
+            'forecast_id': weather_data['forecast_id'],
             'fetched_at': datetime.now().isoformat()
         }
         
@@ -1188,106 +1411,137 @@ def get_stlouis_weather():
     except Exception as e:
         return jsonify({'error': f'Failed to fetch weather: {str(e)}'}), 500
 
-@app.route('/api/chatbot', methods=['POST'])
-def chatbot():
-    """AI chatbot for weather and location questions"""
+# Cities warmed regardless of saved locations, as "City,State,Country" separated by ';'
+CACHE_WARMER_CITIES = [city.strip() for city in os.getenv('CACHE_WARMER_CITIES', 'St. Louis,MO,US').split(';') if city.strip()]
+warm_city_coords = {}
+
+def get_warm_city_coords():
+    """Geocode the warmer's fixed cities once per process"""
+    coords = []
+    for city in CACHE_WARMER_CITIES:
+        if city not in warm_city_coords:
+            name, state, country = (city.split(',') + ['', 'US'])[:3]
+            location, error = get_location_coords(name.strip(), state.strip() or None, country.strip() or 'US')
+            if error:
+                logger.warning("Cache warmer could not geocode %s: %s", city, error)
+                continue
+            warm_city_coords[city] = (location['lat'], location['lon'])
+        coords.append(warm_city_coords[city])
+    return coords
+
+def list_warm_locations(limit):
+    """Fixed cities first, then the most recently accessed saved locations"""
+    locations = get_warm_city_coords()
+    conn = get_db_connection()
+    if not conn:
+        return locations
+    
     try:
-        data = request.get_json()
-        user_message = data.get('message', '').strip()
-        weather_context = data.get('weather_context', {})
-        ai_insights = data.get('ai_insights', {})
-        
-        if not user_message:
-            return jsonify({'error': 'Message is required'}), 400
-        
-        # Check if OpenAI API key is available
-        if not openai_client.api_key:
-            return jsonify({'error': 'OpenAI API key not configured'}), 500
-        
-        # Build context from weather data and AI insights
-        context_parts = []
-        
-        # Add location context
-        if weather_context.get('location'):
-            loc = weather_context['location']
-            context_parts.append(f"Current location: {loc.get('name', '')}, {loc.get('state', '')}, {loc.get('country', '')}")
-        
-        # Add current weather context
-        if weather_context.get('current'):
-            current = weather_context['current']
-            temp = current.get('main', {}).get('temp', 'Unknown')
-            feels_like = current.get('main', {}).get('feels_like', 'Unknown')
-            description = current.get('weather', [{}])[0].get('description', 'Unknown')
-            humidity = current.get('main', {}).get('humidity', 'Unknown')
-            pressure = current.get('main', {}).get('pressure', 'Unknown')
-            wind_speed = current.get('wind', {}).get('speed', 'Unknown')
-            visibility = current.get('visibility', 'Unknown')
-            clouds = current.get('clouds', {}).get('all', 'Unknown')
-            sunrise = current.get('sys', {}).get('sunrise', 'Unknown')
-            sunset = current.get('sys', {}).get('sunset', 'Unknown')
-            
-            context_parts.append(f"Current weather: {temp}°F (feels like {feels_like}°F), {description}")
-            context_parts.append(f"Humidity: {humidity}%, Pressure: {pressure} hPa, Wind: {wind_speed} mph")
-            context_parts.append(f"Visibility: {visibility/1000 if visibility != 'Unknown' else 'Unknown'} km, Cloud cover: {clouds}%")
-            if sunrise != 'Unknown' and sunset != 'Unknown':
-                sunrise_time = datetime.fromtimestamp(sunrise).strftime('%I:%M %p')
-                sunset_time = datetime.fromtimestamp(sunset).strftime('%I:%M %p')
-                context_parts.append(f"Sunrise: {sunrise_time}, Sunset: {sunset_time}")
-        
-        # Add detailed daily forecast context (today's data including UV index)
-        if weather_context.get('forecast', {}).get('daily'):
-            daily_forecast = weather_context['forecast']['daily']
-            today = daily_forecast[0] if daily_forecast else None
-            
-            if today:
-                uv_index = today.get('uvi', 'Unknown')
-                pop = today.get('pop', 0) * 100 if today.get('pop') != 'Unknown' else 'Unknown'
-                day_temp = today.get('temp', {}).get('day', 'Unknown')
-                min_temp = today.get('temp', {}).get('min', 'Unknown')
-                max_temp = today.get('temp', {}).get('max', 'Unknown')
-                
-                context_parts.append(f"Today's forecast: High {max_temp}°F, Low {min_temp}°F")
-                context_parts.append(f"UV Index: {uv_index}, Chance of precipitation: {pop}%")
-        
-        # Add hourly forecast context
-        if weather_context.get('forecast', {}).get('hourly'):
-            hourly_forecast = weather_context['forecast']['hourly']
-            context_parts.append(f"12-hour forecast: {len(hourly_forecast)} hours of detailed data available")
-            
-            # Add next few hours context
-            if len(hourly_forecast) >= 3:
-                next_hours = []
-                for i, hour in enumerate(hourly_forecast[:3]):
-                    hour_time = datetime.fromtimestamp(hour['dt']).strftime('%I %p')
-                    hour_temp = hour.get('temp', 'Unknown')
-                    hour_desc = hour.get('weather', [{}])[0].get('description', 'Unknown')
-                    hour_pop = hour.get('pop', 0) * 100 if hour.get('pop') != 'Unknown' else 0
-                    next_hours.append(f"{hour_time}: {hour_temp}°F, {hour_desc}, {hour_pop}% rain chance")
-                context_parts.append(f"Next few hours: {'; '.join(next_hours)}")
-        
-        # Add extended daily forecast context
-        if weather_context.get('forecast', {}).get('daily'):
-            daily_forecast = weather_context['forecast']['daily']
-            context_parts.append(f"8-day forecast: {len(daily_forecast)} days available")
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT ROUND(lat, 2) AS lat, ROUND(lon, 2) AS lon, MAX(last_accessed) AS last_accessed
+            FROM saved_locations
+            GROUP BY ROUND(lat, 2), ROUND(lon, 2)
+            ORDER BY last_accessed DESC
+            LIMIT %s
+        ''', (limit,))
+        locations += [(float(row['lat']), float(row['lon'])) for row in cursor.fetchall()]
+        cursor.close()
+    finally:
+        conn.close()
+    return locations[:limit]
+
+def refresh_warm_forecast(lat, lon):
+    _, error = fetch_weather_data(lat, lon, refresh=True)
+    return error
+
+start_cache_warmer(list_warm_locations, refresh_warm_forecast)
+
+def build_chatbot_system_prompt(weather_context, ai_insights):
+    """Build the chatbot system prompt from weather data and AI insights"""
+    context_parts = []
+    
+    # Add location context
+    if weather_context.get('location'):
+        loc = weather_context['location']
+        context_parts.append(f"Current location: {loc.get('name', '')}, {loc.get('state', '')}, {loc.get('country', '')}")
+    
+    # Add current weather context
+    if weather_context.get('current'):
+        current = weather_context['current']
+        temp = current.get('main', {}).get('temp', 'Unknown')
+        feels_like = current.get('main', {}).get('feels_like', 'Unknown')
+        description = current.get('weather', [{}])[0].get('description', 'Unknown')
+        humidity = current.get('main', {}).get('humidity', 'Unknown')
+        pressure = current.get('main', {}).get('pressure', 'Unknown')
+        wind_speed = current.get('wind', {}).get('speed', 'Unknown')
+        visibility = current.get('visibility', 'Unknown')
+        clouds = current.get('clouds', {}).get('all', 'Unknown')
+        sunrise = current.get('sys', {}).get('sunrise', 'Unknown')
+        sunset = current.get('sys', {}).get('sunset', 'Unknown')
+        
+        context_parts.append(f"Current weather: {temp}°F (feels like {feels_like}°F), {description}")
+        context_parts.append(f"Humidity: {humidity}%, Pressure: {pressure} hPa, Wind: {wind_speed} mph")
+        context_parts.append(f"Visibility: {visibility/1000 if visibility != 'Unknown' else 'Unknown'} km, Cloud cover: {clouds}%")
+        if sunrise != 'Unknown' and sunset != 'Unknown':
+            sunrise_time = local_time(sunrise, weather_context).strftime('%I:%M %p')
+            sunset_time = local_time(sunset, weather_context).strftime('%I:%M %p')
+            context_parts.append(f"Sunrise: {sunrise_time}, Sunset: {sunset_time}")
+    
+    # Add detailed daily forecast context (today's data including UV index)
+    if weather_context.get('forecast', {}).get('daily'):
+        daily_forecast = weather_context['forecast']['daily']
+        today = daily_forecast[0] if daily_forecast else None
+        
+        if today:
+            uv_index = today.get('uvi', 'Unknown')
+            pop = today.get('pop', 0) * 100 if today.get('pop') != 'Unknown' else 'Unknown'
+            day_temp = today.get('temp', {}).get('day', 'Unknown')
+            min_temp = today.get('temp', {}).get('min', 'Unknown')
+            max_temp = today.get('temp', {}).get('max', 'Unknown')
             
-            # Add next few days summary
-            if len(daily_forecast) >= 4:
-                upcoming_days = []
-                for i, day in enumerate(daily_forecast[1:4]):  # Skip today, get next 3 days
-                    day_date = datetime.fromtimestamp(day['dt']).strftime('%A')
-                    day_high = day.get('temp', {}).get('max', 'Unknown')
-                    day_low = day.get('temp', {}).get('min', 'Unknown')
-                    day_desc = day.get('weather', [{}])[0].get('description', 'Unknown')
-                    day_pop = day.get('pop', 0) * 100 if day.get('pop') != 'Unknown' else 0
-                    upcoming_days.append(f"{day_date}: {day_high}°F/{day_low}°F, {day_desc}, {day_pop}% rain")
-                context_parts.append(f"Upcoming days: {'; '.join(upcoming_days)}")
-        
-        # Add AI insights context
-        if ai_insights.get('suggestions'):
-            context_parts.append(f"AI suggestions: {'; '.join(ai_insights['suggestions'][:3])}")
-        
-        # Create system prompt
-        system_prompt = f"""You are a helpful weather assistant chatbot. You can only answer questions related to weather and location information.
+            context_parts.append(f"Today's forecast: High {max_temp}°F, Low {min_temp}°F")
+            context_parts.append(f"UV Index: {uv_index}, Chance of precipitation: {pop}%")
+    
+    # Add hourly forecast context
+    if weather_context.get('forecast', {}).get('hourly'):
+        hourly_forecast = weather_context['forecast']['hourly']
+        context_parts.append(f"12-hour forecast: {len(hourly_forecast)} hours of detailed data available")
+        
+        # Add next few hours context
+        if len(hourly_forecast) >= 3:
+            next_hours = []
+            for i, hour in enumerate(hourly_forecast[:3]):
+                hour_time = local_time(hour['dt'], weather_context).strftime('%I %p')
+                hour_temp = hour.get('temp', 'Unknown')
+                hour_desc = hour.get('weather', [{}])[0].get('description', 'Unknown')
+                hour_pop = hour.get('pop', 0) * 100 if hour.get('pop') != 'Unknown' else 0
+                next_hours.append(f"{hour_time}: {hour_temp}°F, {hour_desc}, {hour_pop}% rain chance")
+            context_parts.append(f"Next few hours: {'; '.join(next_hours)}")
+    
+    # Add extended daily forecast context
+    if weather_context.get('forecast', {}).get('daily'):
+        daily_forecast = weather_context['forecast']['daily']
+        context_parts.append(f"8-day forecast: {len(daily_forecast)} days available")
+        
+        # Add next few days summary
+        if len(daily_forecast) >= 4:
+            upcoming_days = []
+            for i, day in enumerate(daily_forecast[1:4]):  # Skip today, get next 3 days
+                day_date = local_time(day['dt'], weather_context).strftime('%A')
+                day_high = day.get('temp', {}).get('max', 'Unknown')
+                day_low = day.get('temp', {}).get('min', 'Unknown')
+                day_desc = day.get('weather', [{}])[0].get('description', 'Unknown')
+                day_pop = day.get('pop', 0) * 100 if day.get('pop') != 'Unknown' else 0
+                upcoming_days.append(f"{day_date}: {day_high}°F/{day_low}°F, {day_desc}, {day_pop}% rain")
+            context_parts.append(f"Upcoming days: {'; '.join(upcoming_days)}")
+    
+    # Add AI insights context
+    if ai_insights.get('suggestions'):
+        context_parts.append(f"AI suggestions: {'; '.join(ai_insights['suggestions'][:3])}")
+    
+    # Create system prompt
+    return f"""You are a helpful weather assistant chatbot. You can only answer questions related to weather and location information.
 
 Current context:
 {chr(10).join(context_parts)}
@@ -1299,31 +1553,232 @@ Guidelines:
 - Keep responses concise and helpful
 - Reference specific data from the context when relevant"""
 
-        # Make OpenAI API call
-        response = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            max_tokens=200,
-            temperature=0.7
-        )
+CHATBOT_PROMPTS_PER_FORECAST = 16
+
+def resolve_chatbot_forecast(data):
+    """Find the cached forecast a chat message refers to by forecast id or location"""
+    forecast_id = data.get('forecast_id')
+    if forecast_id:
+        entry = get_forecast_by_id(forecast_id)
+        if entry:
+            return entry
+    
+    # Unknown or evicted id (or another worker's): fall back to the location's forecast
+    location = data.get('location') or {}
+    if location.get('lat') is None or location.get('lon') is None:
+        return None
+    
+    weather_data, error = fetch_weather_data(location['lat'], location['lon'])
+    if error:
+        logger.warning("Chatbot forecast lookup error: %s", error)
+        return None
+    return get_forecast_by_id(weather_data['forecast_id'])
+
+def get_chatbot_system_prompt(entry, location, ai_insights):
+    """Get the chatbot system prompt for a cached forecast, memoized per forecast version"""
+    location = location or {}
+    suggestions = tuple(ai_insights.get('suggestions') or [])[:3]
+    key = ('chatbot_prompt', location.get('name', ''), location.get('state', ''), location.get('country', ''), suggestions)
+    
+    prompts = entry['derived']
+    system_prompt = prompts.get(key)
+    if system_prompt is None:
+        weather_context = dict(entry['data'], location=location) if location else entry['data']
+        system_prompt = build_chatbot_system_prompt(weather_context, {'suggestions': list(suggestions)})
+        if len(prompts) < CHATBOT_PROMPTS_PER_FORECAST:
+            prompts[key] = system_prompt
+    
+    return system_prompt
+
+def prepare_chatbot_request(data):
+    """
+    Validate a chatbot request body and build the OpenAI messages for it
+    Returns (chat, error); chat carries the messages, conversation and cached forecast
+    """
+    data = data or {}
+    if not isinstance(data, dict):
+        return None, 'Request body must be a JSON object'
+    user_message = data.get('message') or ''
+    if not isinstance(user_message, str):
+        return None, 'Message must be a string'
+    user_message = user_message.strip()
+    if not user_message:
+        return None, 'Message is required'
+    for field in ('location', 'ai_insights', 'weather_context'):
+        if data.get(field) is not None and not isinstance(data[field], dict):
+            return None, f'{field} must be an object'
+    for field in ('forecast_id', 'conversation_id'):
+        if data.get(field) is not None and not isinstance(data[field], str):
+            return None, f'{field} must be a string'
+    
+    ai_insights = data.get('ai_insights') or {}
+    entry = resolve_chatbot_forecast(data)
+    if entry:
+        system_prompt = get_chatbot_system_prompt(entry, data.get('location'), ai_insights)
+    else:
+        # Older clients post the whole weather context with every message
+        system_prompt = build_chatbot_system_prompt(data.get('weather_context') or {}, ai_insights)
+    
+    # Prior turns of this conversation (summarized when old) give follow-ups their context
+    conversation_id = start_conversation(data.get('conversation_id'))
+    messages = build_conversation_messages(conversation_id, system_prompt, user_message)
+    
+    return {
+        'message': user_message,
+        'location': data.get('location'),
+        'messages': messages,
+        'conversation_id': conversation_id,
+        'forecast_entry': entry,
+        # Only the system prompt and the new message means no earlier turns
+        'has_history': len(messages) > 2
+    }, None
+
+def answer_chatbot_without_model(chat):
+    """
+    Answer from forecast data or the answer cache when possible
+    Returns (answer, source) with source 'intent_router' or 'answer_cache', or (None, 'model')
+    """
+    entry = chat['forecast_entry']
+    if entry is None:
+        return None, 'model'
+    
+    # Factual questions ("what time is sunset") are answered exactly from the forecast
+    answer = answer_locally(chat['message'], entry['data'], chat['location'])
+    if answer is not None:
+        return answer, 'intent_router'
+    
+    # A follow-up ("what about tomorrow?") depends on earlier turns, so a cached answer to the same words may not fit
+    if not chat['has_history']:
+        answer = find_cached_answer(entry, chat['message'])
+        if answer is not None:
+            return answer, 'answer_cache'
+    
+    return None, 'model'
+
+def build_degraded_chatbot_answer(chat):
+    """Answer from rule-based insights when the AI budget is exhausted"""
+    entry = chat['forecast_entry']
+    rule_insights = generate_rule_based_insights(entry['data']) if entry else {'context_warnings': [], 'suggestions': []}
+    highlights = rule_insights['context_warnings'][:2] + rule_insights['suggestions'][:2]
+    if not highlights:
+        return "I'm handling a lot of questions right now. Please try again in a minute."
+    return "I'm handling a lot of questions right now, so here is a quick summary: " + ' '.join(
+        highlight.rstrip('.') + '.' for highlight in highlights
+    )
+
+def finish_chatbot_turn(chat, bot_response, source='model'):
+    """Record the turn in the conversation and cache model answers that did not depend on earlier turns"""
+    record_turn(chat['conversation_id'], chat['message'], bot_response)
+    if source == 'model' and not chat['has_history'] and chat['forecast_entry'] is not None:
+        store_answer(chat['forecast_entry'], chat['message'], bot_response)
+
+@app.route('/api/chatbot', methods=['POST'])
+@limit_ai_requests('chatbot')
+def chatbot():
+    """AI chatbot for weather and location questions"""
+    try:
+        chat, error = prepare_chatbot_request(request.get_json(silent=True))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        local_answer, source = answer_chatbot_without_model(chat)
+        if local_answer is not None:
+            finish_chatbot_turn(chat, local_answer, source)
+            return jsonify({
+                'success': True,
+                'response': local_answer,
+                'conversation_id': chat['conversation_id'],
+                'source': source
+            })
+        
+        # Check if OpenAI API key is available
+        try:
+            openai_client = get_openai_client()
+        except ValueError:
+            return jsonify({'error': 'OpenAI API key not configured'}), 500
+        
+        # Make OpenAI API call with the routed model settings
+        try:
+            response = create_chat_completion(openai_client, 'chatbot', chat['messages'])
+        except (AIBudgetExceeded, CircuitOpenError) as e:
+            logger.warning("Chatbot degraded: %s", e)
+            return jsonify({
+                'success': True,
+                'response': build_degraded_chatbot_answer(chat),
+                'conversation_id': chat['conversation_id'],
+                'source': 'rules'
+            })
         
         bot_response = response.choices[0].message.content.strip()
+        finish_chatbot_turn(chat, bot_response)
         
         return jsonify({
             'success': True,
-            'response': bot_response
+            'response': bot_response,
+            'conversation_id': chat['conversation_id'],
+            'source': 'model'
         })
         
-    except Exception as e:
-        print(f"Chatbot error: {e}")
+    except Exception:
+        logger.exception("Chatbot error")
         return jsonify({
             'success': False, 
             'error': 'Sorry, I encountered an error. Please try again.'
         }), 500
 
+@app.route('/api/chatbot/stream', methods=['POST'])
+@limit_ai_requests('chatbot')
+def chatbot_stream():
+    """AI chatbot that relays response tokens as Server-Sent Events"""
+    chat, error = prepare_chatbot_request(request.get_json(silent=True))
+    if error:
+        return jsonify({'error': error}), 400
+    
+    local_answer, source = answer_chatbot_without_model(chat)
+    openai_client = None
+    if local_answer is None:
+        # Check if OpenAI API key is available
+        try:
+            openai_client = get_openai_client()
+        except ValueError:
+            return jsonify({'error': 'OpenAI API key not configured'}), 500
+    
+    def generate():
+        if local_answer is not None:
+            finish_chatbot_turn(chat, local_answer, source)
+            yield format_sse('token', {'content': local_answer})
+            yield format_sse('done', {'response': local_answer, 'conversation_id': chat['conversation_id'], 'source': source})
+            return
+        
+        parts = []
+        try:
+            for token in stream_chat_completion(openai_client, 'chatbot', chat['messages']):
+                parts.append(token)
+                yield format_sse('token', {'content': token})
+            
+            bot_response = ''.join(parts).strip()
+            finish_chatbot_turn(chat, bot_response)
+            yield format_sse('done', {'response': bot_response, 'conversation_id': chat['conversation_id'], 'source': 'model'})
+            
+        except (AIBudgetExceeded, CircuitOpenError) as e:
+            logger.warning("Chatbot degraded: %s", e)
+            degraded_answer = build_degraded_chatbot_answer(chat)
+            yield format_sse('token', {'content': degraded_answer})
+            yield format_sse('done', {'response': degraded_answer, 'conversation_id': chat['conversation_id'], 'source': 'rules'})
+        except Exception:
+            logger.exception("Chatbot stream error")
+            yield format_sse('error', {'error': 'Sorry, I encountered an error. Please try again.'})
+    
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    
+    # Hold the client's job slot until the stream has been fully sent or dropped
+    job_slot = detach_ai_job_slot()
+    if job_slot:
+        response.call_on_close(job_slot.release)
+    return response
+
 if __name__ == '__main__':
     # Railway provides the PORT environment variable
     port = int(os.environ.get('PORT', 5000))
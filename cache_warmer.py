@@ -0,0 +1,109 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from forecast_cache import get_forecast_expiry, make_location_key
+
+logger = logging.getLogger(__name__)
+
+# Background refresh of the most-accessed forecasts before they expire
+CACHE_WARMER_ENABLED = os.getenv('CACHE_WARMER_ENABLED', 'true').lower() != 'false'
+CACHE_WARMER_INTERVAL_SECONDS = int(os.getenv('CACHE_WARMER_INTERVAL_SECONDS', '60'))
+CACHE_WARMER_TOP_N = int(os.getenv('CACHE_WARMER_TOP_N', '50'))
+# Forecasts expiring within this window are refreshed ahead of time
+CACHE_WARMER_REFRESH_AHEAD_SECONDS = int(os.getenv('CACHE_WARMER_REFRESH_AHEAD_SECONDS', '120'))
+# Upstream One Call requests the warmer may make per hour, per worker process
+CACHE_WARMER_CALLS_PER_HOUR = int(os.getenv('CACHE_WARMER_CALLS_PER_HOUR', '300'))
+
+_lock = threading.Lock()
+_calls = deque()  # timestamps of warmer upstream calls in the last hour
+_stats = {'runs': 0, 'refreshed': 0, 'fresh': 0, 'errors': 0, 'budget_skips': 0, 'last_run_at': None}  # budget_skips counts runs cut short
+_thread = None
+
+def _take_budget(now):
+    """Claim one upstream call from the hourly budget, or return False when it is used up"""
+    with _lock:
+        while _calls and _calls[0] <= now - 3600:
+            _calls.popleft()
+        if len(_calls) >= CACHE_WARMER_CALLS_PER_HOUR:
+            return False
+        _calls.append(now)
+        return True
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+
+def warm_once(list_locations, refresh_forecast):
+    """
+    Refresh forecasts for the top locations that are missing or about to expire
+    list_locations(limit) returns (lat, lon) pairs, most important first
+    refresh_forecast(lat, lon) fetches from upstream and returns an error or None
+    """
+    try:
+        locations = list_locations(CACHE_WARMER_TOP_N)
+    except Exception as e:
+        logger.warning("Cache warmer could not list locations: %s", e)
+        _count('errors')
+        return
+
+    seen = set()
+    for lat, lon in locations:
+        key = make_location_key(lat, lon)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        now = time.time()
+        expires_at = get_forecast_expiry(lat, lon)
+        if expires_at is not None and expires_at - now > CACHE_WARMER_REFRESH_AHEAD_SECONDS:
+            _count('fresh')
+            continue
+        if not _take_budget(now):
+            # Locations are ordered by importance, so the rest can wait for the next run
+            _count('budget_skips')
+            break
+
+        try:
+            error = refresh_forecast(lat, lon)
+        except Exception as e:
+            error = str(e)
+        if error:
+            logger.warning("Cache warmer failed to refresh %s: %s", key, error)
+            _count('errors')
+        else:
+            _count('refreshed')
+
+    with _lock:
+        _stats['runs'] += 1
+        _stats['last_run_at'] = time.time()
+
+def start_cache_warmer(list_locations, refresh_forecast):
+    """Start the warmer thread for this process; later calls are no-ops"""
+    global _thread
+    if not CACHE_WARMER_ENABLED or CACHE_WARMER_CALLS_PER_HOUR <= 0:
+        return
+
+    def run():
+        while True:
+            warm_once(list_locations, refresh_forecast)
+            time.sleep(CACHE_WARMER_INTERVAL_SECONDS)
+
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=run, name='cache-warmer', daemon=True)
+    _thread.start()
+
+def get_cache_warmer_stats():
+    """Get warmer counters and how much of the hourly upstream budget is used"""
+    with _lock:
+        now = time.time()
+        return dict(
+            _stats,
+            enabled=_thread is not None,
+            calls_last_hour=sum(1 for called_at in _calls if called_at > now - 3600),
+            calls_per_hour_budget=CACHE_WARMER_CALLS_PER_HOUR
+        )
@@ -0,0 +1,110 @@
+import os
+import re
+import threading
+
+from metrics import record_cache_lookup
+
+# Chatbot answers reused for near-identical questions about the same forecast version
+CHAT_ANSWER_CACHE_ENABLED = os.getenv('CHAT_ANSWER_CACHE_ENABLED', 'true').lower() != 'false'
+CHAT_ANSWER_CACHE_SIMILARITY = float(os.getenv('CHAT_ANSWER_CACHE_SIMILARITY', '0.8'))
+CHAT_ANSWER_CACHE_MAX_PER_FORECAST = int(os.getenv('CHAT_ANSWER_CACHE_MAX_PER_FORECAST', '50'))
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+_FILLER_WORDS = {'a', 'an', 'the', 'please', 'hey', 'hi', 'hello', 'so', 'um', 'like', 'just', 'thanks'}
+# Words that only shape a question; every other word (hiking, dog, tomorrow, high) changes the answer
+_FUNCTION_WORDS = {
+    'is', 'it', 'its', 's', 'be', 'am', 'pm', 'are', 'was', 'will', 'would', 'going', 'gonna', 'to', 'do', 'does',
+    'i', 'me', 'my', 'we', 'our', 'you', 'what', 'whats', 'how', 'when', 'there', 'any', 'for', 'of', 'on', 'at',
+    'in', 'with', 'this', 'that', 'should', 'can', 'could', 'get', 'go', 'out', 'outside'
+}
+# Numbers with their unit, read before punctuation is stripped: 3pm, 10 am, 3:30pm, 14th, 5
+_NUMBER_TOKEN = re.compile(r'\d+(?::\d+)?(?:\s*(?:am|pm|st|nd|rd|th)\b)?')
+
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+def normalize_question(question):
+    """Lowercase, strip punctuation and filler words"""
+    words = _NON_WORD.sub(' ', question.lower()).split()
+    return ' '.join(word for word in words if word not in _FILLER_WORDS)
+
+def _trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def _qualifiers(question):
+    """
+    Number-bearing tokens and content words in a question; these must match exactly
+    Trigram similarity then only tolerates differences in wording, not in what is asked
+    """
+    numbers = {re.sub(r'\s+', '', token) for token in _NUMBER_TOKEN.findall(question.lower())}
+    words = {
+        word for word in normalize_question(question).split()
+        if word not in _FUNCTION_WORDS and not any(char.isdigit() for char in word)
+    }
+    return frozenset(numbers | words)
+
+def _similarity(a, b):
+    """Jaccard similarity of two trigram sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+def find_cached_answer(entry, question):
+    """Get a cached answer for a question about a forecast entry, or None"""
+    if not CHAT_ANSWER_CACHE_ENABLED:
+        return None
+
+    normalized = normalize_question(question)
+    answers = entry['derived'].get('chat_answers')
+
+    answer = None
+    if answers and normalized:
+        cached = answers.get(normalized)
+        if cached:
+            answer = cached['answer']
+        else:
+            grams = _trigrams(normalized)
+            qualifiers = _qualifiers(question)
+            best = 0.0
+            for cached in list(answers.values()):
+                if cached['qualifiers'] != qualifiers:
+                    continue
+                score = _similarity(grams, cached['trigrams'])
+                if score >= CHAT_ANSWER_CACHE_SIMILARITY and score > best:
+                    best = score
+                    answer = cached['answer']
+
+    with _lock:
+        _stats["hits" if answer is not None else "misses"] += 1
+    record_cache_lookup('chat_answer', answer is not None)
+    return answer
+
+def store_answer(entry, question, answer):
+    """Remember the answer to a question about a forecast entry"""
+    if not CHAT_ANSWER_CACHE_ENABLED:
+        return
+
+    normalized = normalize_question(question)
+    if not normalized or not answer:
+        return
+
+    answers = entry['derived'].setdefault('chat_answers', {})
+    if len(answers) >= CHAT_ANSWER_CACHE_MAX_PER_FORECAST and normalized not in answers:
+        return
+    answers[normalized] = {
+        'answer': answer,
+        'trigrams': _trigrams(normalized),
+        'qualifiers': _qualifiers(question)
+    }
+
+def get_answer_cache_stats():
+    """Get hit/miss counters, hit rate and the configured similarity threshold"""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return dict(
+            _stats,
+            hit_rate=round(_stats["hits"] / lookups, 4) if lookups else 0.0,
+            similarity_threshold=CHAT_ANSWER_CACHE_SIMILARITY,
+            enabled=CHAT_ANSWER_CACHE_ENABLED
+        )
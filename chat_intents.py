@@ -0,0 +1,204 @@
+import re
+import threading
+
+from weather_rules import local_time
+
+# Factual chatbot questions answered straight from the processed forecast, without the model
+MAX_LOCAL_QUESTION_WORDS = 14
+
+_OPEN_ENDED = re.compile(
+    r'\b(why|should|recommend|suggest|advice|wear|plan|compare|explain|best|worth|safe|ok to|okay to|'
+    r'good (day|time|idea)|what (can|could|to) (i|we) do|or|but|also)\b'
+)
+_SUNRISE = re.compile(r'\b(sun ?rise|sunup|dawn)\b')
+_SUNSET = re.compile(r'\b(sun ?set|sundown|dusk)\b')
+_UV = re.compile(r'\b(uv|uvi|ultraviolet)\b')
+_HUMIDITY = re.compile(r'\bhumid(ity)?\b')
+_WIND = re.compile(r'\b(wind|windy|breezy|gusts?)\b')
+_RAIN_CHANCE = re.compile(
+    r'\b(chance|probability|odds|likely|will it|is it going to|going to)\b.*\b(rain|precipitation|showers?|snow)\b|'
+    r'\b(rain|precipitation|showers?|snow)\b.*\b(chance|probability|odds|likely)\b'
+)
+_HIGH = re.compile(r'\b(high|max(imum)?|how hot|warmest)\b')
+_LOW = re.compile(r'\b(low|min(imum)?|how cold|coldest|coolest)\b')
+_CURRENT_TEMP = re.compile(r'\b(temp|temperature|feels? like|how (hot|cold|warm) is it)\b')
+# "How hot is it" asks for the current temperature even though "how hot" otherwise means the high
+_CURRENT_PHRASING = re.compile(r'\bhow (hot|cold|warm) is it\b')
+# Only the temperature and rain chance are kept in the hourly forecast
+_HOURLY_TEMP = re.compile(r'\b(temp|temperature|how (hot|cold|warm))\b')
+_FEELS_LIKE = re.compile(r'\bfeels? like\b')
+# Words that can follow "in" without naming a place ("in the morning", "in here")
+_NOT_PLACES = {'the', 'morning', 'afternoon', 'evening', 'here'}
+_HOUR = re.compile(r'\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b')
+_WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+_MONTHS = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october',
+           'november', 'december', 'jan', 'feb', 'mar', 'apr', 'jun', 'jul', 'aug', 'sep', 'sept', 'oct', 'nov', 'dec']
+# Time references that cannot be mapped to a single forecast day; these questions go to the model
+_UNRESOLVED_TIME = re.compile(
+    r'\b(weekend|weeks?|yesterday|last|past|ago|next|previous|later|coming|upcoming|rest of|through|until|'
+    r'days|hours|day after|months?|years?|seasons?|winter|spring|summer|autumn|'
+    r'\d+(st|nd|rd|th)|' + '|'.join(_MONTHS) + r')\b'
+)
+
+_lock = threading.Lock()
+_stats = {"local": 0, "forwarded": 0}
+
+def _format_clock(moment, minutes=True):
+    return moment.strftime('%I:%M %p' if minutes else '%I %p').lstrip('0')
+
+def _find_day(question, weather_data):
+    """
+    Resolve the day a question asks about to (label, daily entry)
+    Only a question with no time reference at all means today; one that cannot be resolved gets (None, None)
+    """
+    daily = weather_data.get('forecast', {}).get('daily', [])
+    if not daily or _UNRESOLVED_TIME.search(question):
+        return None, None
+    if 'tomorrow' in question:
+        return ('tomorrow', daily[1]) if len(daily) > 1 else (None, None)
+    for name in _WEEKDAYS:
+        if re.search(rf'\b{name}\b', question):
+            for day in daily:
+                if 'dt' in day and local_time(day['dt'], weather_data).strftime('%A').lower() == name:
+                    return f"on {name.capitalize()}", day
+            return None, None
+    return 'today', daily[0]
+
+def _find_hour(question, weather_data):
+    """Resolve an 'at 3pm' style time, on the day the question names, to (label, hourly entry)"""
+    match = _HOUR.search(question)
+    if not match:
+        return None, None
+    day_label, day = _find_day(question, weather_data)
+    if day is None or 'dt' not in day:
+        return None, None
+    date = local_time(day['dt'], weather_data).date()
+    hour = int(match.group(1)) % 12 + (12 if match.group(3) == 'pm' else 0)
+    for entry in weather_data.get('forecast', {}).get('hourly', []):
+        if 'dt' not in entry:
+            continue
+        moment = local_time(entry['dt'], weather_data)
+        if moment.date() == date and moment.hour == hour:
+            label = _format_clock(moment, minutes=False)
+            return (label if day_label == 'today' else f"{label} {day_label}"), entry
+    return None, None
+
+def _normalize(text):
+    return ' '.join(re.sub(r"[^a-z0-9:' ]+", ' ', text.lower()).split())
+
+def _names_other_place(question, normalized, location):
+    """Whether the question asks about a place, e.g. "in Denver", other than the loaded location"""
+    own = _normalize((location or {}).get('name') or '').split()
+    own_word = own[0] if own else None
+    capitalized = [_normalize(word) for word in re.findall(r'\bin (?:the )?([A-Z][^\s,?!]*)', question)]
+    words = re.findall(r'\bin ([a-z]+)\b', normalized)
+    return any(word and word != own_word for word in capitalized) or any(
+        word not in _NOT_PLACES and word != own_word for word in words
+    )
+
+def _place(location):
+    name = (location or {}).get('name')
+    return f" in {name}" if name else ""
+
+def _classify_and_answer(question, weather_data, location):
+    current = weather_data.get('current', {})
+    place = _place(location)
+    at_hour = _HOUR.search(question)
+
+    if _SUNRISE.search(question) or _SUNSET.search(question):
+        sys_times = current.get('sys', {})
+        which = 'sunrise' if _SUNRISE.search(question) else 'sunset'
+        if which not in sys_times or at_hour or _UNRESOLVED_TIME.search(question) or re.search(r'\b(tomorrow|tonight|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b', question):
+            return None
+        return f"{which.capitalize()}{place} is at {_format_clock(local_time(sys_times[which], weather_data))} today."
+
+    if _RAIN_CHANCE.search(question):
+        label, hour = _find_hour(question, weather_data)
+        if at_hour:
+            if hour is None:
+                return None
+            return f"The chance of precipitation{place} at {label} is {round(hour.get('pop', 0) * 100)}%."
+        label, day = _find_day(question, weather_data)
+        if day is None:
+            return None
+        return f"The chance of precipitation{place} {label} is {round(day.get('pop', 0) * 100)}%."
+
+    if at_hour:
+        # Current values and daily figures would not answer a question about a particular hour
+        if not _HOURLY_TEMP.search(question) or _FEELS_LIKE.search(question):
+            return None
+        label, hour = _find_hour(question, weather_data)
+        if hour is None or 'temp' not in hour:
+            return None
+        return f"The temperature{place} at {label} is forecast to be {round(hour['temp'])}°F."
+
+    if _UV.search(question):
+        label, day = _find_day(question, weather_data)
+        if day is None or 'uvi' not in day:
+            return None
+        return f"The UV index{place} {label} peaks at {round(day['uvi'], 1)}."
+
+    if _HUMIDITY.search(question):
+        label, day = _find_day(question, weather_data)
+        if label == 'today' and 'humidity' in current.get('main', {}):
+            return f"The humidity{place} is currently {current['main']['humidity']}%."
+        if day is None or 'humidity' not in day:
+            return None
+        return f"The humidity{place} {label} is expected to be around {day['humidity']}%."
+
+    if _WIND.search(question):
+        speed = current.get('wind', {}).get('speed')
+        if speed is None or _find_day(question, weather_data)[0] != 'today':
+            return None
+        return f"The wind{place} is currently {round(speed)} mph."
+
+    high = _HIGH.search(question)
+    low = _LOW.search(question)
+    if (high or low) and not _CURRENT_PHRASING.search(question):
+        label, day = _find_day(question, weather_data)
+        if day is None:
+            return None
+        temp = day.get('temp', {})
+        if high and low:
+            return f"The forecast{place} {label} is a high of {round(temp['max'])}°F and a low of {round(temp['min'])}°F."
+        if high:
+            return f"The high{place} {label} is {round(temp['max'])}°F."
+        return f"The low{place} {label} is {round(temp['min'])}°F."
+
+    if _CURRENT_TEMP.search(question):
+        main = current.get('main', {})
+        if 'temp' not in main or _find_day(question, weather_data)[0] != 'today':
+            return None
+        answer = f"It is currently {round(main['temp'])}°F{place}"
+        if 'feels_like' in main:
+            answer += f" and feels like {round(main['feels_like'])}°F"
+        return answer + "."
+
+    return None
+
+def answer_locally(question, weather_data, location=None):
+    """
+    Answer a factual weather question from forecast data, or return None to forward it to the model
+    Every call counts towards the local/forwarded share
+    """
+    normalized = _normalize(question)
+
+    answer = None
+    # Compound questions go to the model, except a plain "high and low"
+    compound = ' and ' in normalized and not re.search(r'\b(high and low|low and high)\b', normalized)
+    if (len(normalized.split()) <= MAX_LOCAL_QUESTION_WORDS and not compound and not _OPEN_ENDED.search(normalized)
+            and not _names_other_place(question, normalized, location)):
+        try:
+            answer = _classify_and_answer(normalized, weather_data, location)
+        except (KeyError, TypeError, ValueError):
+            answer = None
+
+    with _lock:
+        _stats["local" if answer is not None else "forwarded"] += 1
+    return answer
+
+def get_intent_router_stats():
+    """Get counts of locally answered and forwarded messages and the local share"""
+    with _lock:
+        total = _stats["local"] + _stats["forwarded"]
+        return dict(_stats, local_share=round(_stats["local"] / total, 4) if total else 0.0)
@@ -0,0 +1,111 @@
+import os
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from ai_weather import count_tokens
+
+# Server-side chatbot conversations: recent turns verbatim, older turns compacted into a summary
+CHAT_SESSION_TTL_SECONDS = int(os.getenv('CHAT_SESSION_TTL_SECONDS', '1800'))
+CHAT_SESSION_MAX_SESSIONS = int(os.getenv('CHAT_SESSION_MAX_SESSIONS', '5000'))
+CHAT_HISTORY_TOKEN_BUDGET = int(os.getenv('CHAT_HISTORY_TOKEN_BUDGET', '600'))
+CHAT_SUMMARY_TOKEN_BUDGET = int(os.getenv('CHAT_SUMMARY_TOKEN_BUDGET', '150'))
+CHAT_SUMMARY_SNIPPET_CHARS = 120
+
+_sessions = OrderedDict()  # conversation id -> session, least recently used first
+_lock = threading.Lock()
+
+_FIRST_SENTENCE = re.compile(r'^(.+?[.!?])(\s|$)', re.DOTALL)
+
+def _compact_text(text):
+    """Shorten a message to its first sentence, capped in length"""
+    text = ' '.join(text.split())
+    match = _FIRST_SENTENCE.match(text)
+    if match:
+        text = match.group(1)
+    if len(text) > CHAT_SUMMARY_SNIPPET_CHARS:
+        text = text[:CHAT_SUMMARY_SNIPPET_CHARS - 3].rstrip() + '...'
+    return text
+
+def _new_session():
+    return {
+        'turns': [],  # [{'user', 'assistant', 'tokens'}], oldest first
+        'summary': [],  # compacted lines for turns that left the window, oldest first
+        'history_tokens': 0,
+        'summary_tokens': 0,
+        'last_used': time.time()
+    }
+
+def _expire_sessions(now):
+    """Drop sessions past their TTL; caller holds the lock"""
+    while _sessions:
+        conversation_id, session = next(iter(_sessions.items()))
+        if session['last_used'] + CHAT_SESSION_TTL_SECONDS > now:
+            break
+        del _sessions[conversation_id]
+
+def _get_session(conversation_id):
+    """Get a live session and mark it recently used; caller holds the lock"""
+    now = time.time()
+    _expire_sessions(now)
+    session = _sessions.get(conversation_id)
+    if session is not None:
+        session['last_used'] = now
+        _sessions.move_to_end(conversation_id)
+    return session
+
+def start_conversation(conversation_id=None):
+    """Return the id of a live conversation, creating a new one if the given id is unknown or expired"""
+    with _lock:
+        if conversation_id and _get_session(conversation_id) is not None:
+            return conversation_id
+
+        conversation_id = secrets.token_urlsafe(16)
+        _sessions[conversation_id] = _new_session()
+        while len(_sessions) > CHAT_SESSION_MAX_SESSIONS:
+            _sessions.popitem(last=False)
+        return conversation_id
+
+def build_conversation_messages(conversation_id, system_prompt, user_message):
+    """Build OpenAI messages with the conversation summary and recent turns before the new message"""
+    messages = [{"role": "system", "content": system_prompt}]
+
+    with _lock:
+        session = _get_session(conversation_id)
+        if session is not None:
+            if session['summary']:
+                messages.append({
+                    "role": "system",
+                    "content": "Summary of earlier conversation:\n" + "\n".join(session['summary'])
+                })
+            for turn in session['turns']:
+                messages.append({"role": "user", "content": turn['user']})
+                messages.append({"role": "assistant", "content": turn['assistant']})
+
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+def record_turn(conversation_id, user_message, assistant_message):
+    """Append a finished turn, compacting the oldest turns once the history exceeds its token budget"""
+    turn_tokens = count_tokens(user_message) + count_tokens(assistant_message)
+
+    with _lock:
+        session = _get_session(conversation_id)
+        if session is None:
+            return
+
+        session['turns'].append({'user': user_message, 'assistant': assistant_message, 'tokens': turn_tokens})
+        session['history_tokens'] += turn_tokens
+
+        # Keep at least the latest turn verbatim
+        while session['history_tokens'] > CHAT_HISTORY_TOKEN_BUDGET and len(session['turns']) > 1:
+            oldest = session['turns'].pop(0)
+            session['history_tokens'] -= oldest['tokens']
+            line = f"- User asked: {_compact_text(oldest['user'])} Assistant: {_compact_text(oldest['assistant'])}"
+            session['summary'].append(line)
+            session['summary_tokens'] += count_tokens(line)
+
+        while session['summary_tokens'] > CHAT_SUMMARY_TOKEN_BUDGET and session['summary']:
+            session['summary_tokens'] -= count_tokens(session['summary'].pop(0))
@@ -0,0 +1,138 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+# Defaults for every breaker; individual breakers can override them
+CIRCUIT_FAILURE_RATE_THRESHOLD = float(os.getenv('CIRCUIT_FAILURE_RATE_THRESHOLD', '0.5'))
+CIRCUIT_MINIMUM_CALLS = int(os.getenv('CIRCUIT_MINIMUM_CALLS', '5'))
+CIRCUIT_WINDOW_SIZE = int(os.getenv('CIRCUIT_WINDOW_SIZE', '20'))
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', '30'))
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+class CircuitBreaker:
+    """
+    Failure-rate circuit breaker over the last window_size calls
+    Open circuits fail fast for open_seconds, then let a single half-open probe through
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_rate_threshold=None, minimum_calls=None, window_size=None,
+                 open_seconds=None, slow_call_seconds=None):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold or CIRCUIT_FAILURE_RATE_THRESHOLD
+        self.minimum_calls = minimum_calls or CIRCUIT_MINIMUM_CALLS
+        self.open_seconds = open_seconds or CIRCUIT_OPEN_SECONDS
+        # Calls slower than this count as failures, so a hanging dependency trips the breaker too
+        self.slow_call_seconds = slow_call_seconds
+        self._outcomes = deque(maxlen=window_size or CIRCUIT_WINDOW_SIZE)  # True for failures
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._stats = {'successes': 0, 'failures': 0, 'rejected': 0, 'last_success_at': None, 'last_failure_at': None}
+
+    def allow_request(self):
+        """Check whether a call may go ahead; every allowed call must record its outcome"""
+        with self._lock:
+            if self._state == self.OPEN and time.time() - self._opened_at >= self.open_seconds:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self._stats['rejected'] += 1
+            return False
+
+    def record_success(self, duration=None):
+        if self.slow_call_seconds is not None and duration is not None and duration > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._stats['successes'] += 1
+            self._stats['last_success_at'] = time.time()
+            if self._state == self.HALF_OPEN:
+                logger.info("Circuit '%s' closed after successful probe", self.name)
+                self._state = self.CLOSED
+                self._probe_in_flight = False
+                self._outcomes.clear()
+            self._outcomes.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            now = time.time()
+            self._stats['failures'] += 1
+            self._stats['last_failure_at'] = now
+            if self._state == self.HALF_OPEN:
+                self._open(now)
+                return
+            self._outcomes.append(True)
+            if len(self._outcomes) >= self.minimum_calls:
+                failure_rate = sum(self._outcomes) / len(self._outcomes)
+                if failure_rate >= self.failure_rate_threshold and self._state == self.CLOSED:
+                    self._open(now)
+
+    def record_error(self, status_code=None, duration=None):
+        """
+        Record a failed call by its HTTP status; None means a timeout or connection error
+        Only those, 429 and 5xx count against the dependency: other 4xx mean the request itself was bad
+        """
+        if status_code is None or status_code == 429 or status_code >= 500:
+            self.record_failure()
+        else:
+            self.record_success(duration)
+
+    def cancel(self):
+        """Give back an allowed call that never reached the dependency"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+
+    def _open(self, now):
+        """Trip the breaker; caller holds the lock"""
+        logger.warning("Circuit '%s' opened for %ss", self.name, self.open_seconds)
+        self._state = self.OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+
+    def snapshot(self):
+        """Get the breaker's state and counters"""
+        with self._lock:
+            state = self._state
+            if state == self.OPEN and time.time() - self._opened_at >= self.open_seconds:
+                state = self.HALF_OPEN
+            return dict(
+                self._stats,
+                state=state,
+                failure_rate=round(sum(self._outcomes) / len(self._outcomes), 4) if self._outcomes else 0.0,
+                window_calls=len(self._outcomes)
+            )
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name, **options):
+    """Get the named circuit breaker, creating it with the given options on first use"""
+    with _breakers_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **options)
+        return breaker
+
+def get_breaker_states():
+    """Get a snapshot of every circuit breaker by name"""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
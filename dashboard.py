@@ -964,6 +964,12 @@ def weather_dashboard():
             margin-bottom: 5px;
         }
 
+        .saved-location-conditions {
+            color: #e8e8e8;
+            font-size: 13px;
+            margin-bottom: 5px;
+        }
+
         .saved-location-details {
             color: #b8b8b8;
             font-size: 12px;
@@ -1204,8 +1210,10 @@ def weather_dashboard():
         let userCurrentLocation = null;
         let searchTimeout = null;
         let currentAnalysisId = null;
+        let currentRuleInsights = {};
         let currentWeatherData = null;
         let currentAIInsights = null;
+        let chatConversationId = null;
         let lastViewedLocation = null;
         
         // Authentication variables
@@ -1701,8 +1709,18 @@ def weather_dashboard():
                 
                 if (data.success) {
                     currentAnalysisId = data.analysis_id;
-                    // Poll for results
-                    pollAIResults();
+                    // Show the instant rule-based insights; AI sections replace them as they arrive
+                    currentRuleInsights = {
+                        context_warnings: data.ai_analysis.context_warnings,
+                        suggestions: data.ai_analysis.suggestions
+                    };
+                    displayAIInsights(currentRuleInsights, true);
+                    // Stream results as they are ready, polling when streaming is unsupported
+                    if (window.EventSource) {
+                        streamAIResults();
+                    } else {
+                        pollAIResults();
+                    }
                 } else {
                     throw new Error(data.error || 'AI analysis failed');
                 }
@@ -1716,6 +1734,42 @@ def weather_dashboard():
             }
         }
 
+        function streamAIResults() {
+            if (!currentAnalysisId) return;
+            
+            const analysisId = currentAnalysisId;
+            const partialAnalysis = Object.assign({}, currentRuleInsights);
+            const source = new EventSource(`/api/ai/stream/${analysisId}`);
+            
+            source.addEventListener('section', (event) => {
+                if (analysisId !== currentAnalysisId) {
+                    source.close();
+                    return;
+                }
+                const data = JSON.parse(event.data);
+                partialAnalysis[data.section] = data.value;
+                displayAIInsights(partialAnalysis, true);
+            });
+            
+            source.addEventListener('complete', (event) => {
+                source.close();
+                if (analysisId !== currentAnalysisId) return;
+                displayAIInsights(JSON.parse(event.data));
+                currentAnalysisId = null;
+            });
+            
+            source.addEventListener('timeout', () => {
+                source.close();
+                if (analysisId === currentAnalysisId) pollAIResults();
+            });
+            
+            // Covers both server 'error' events and dropped connections
+            source.addEventListener('error', () => {
+                source.close();
+                if (analysisId === currentAnalysisId) pollAIResults();
+            });
+        }
+
         async function pollAIResults() {
             if (!currentAnalysisId) return;
             
@@ -1727,6 +1781,9 @@ def weather_dashboard():
                     displayAIInsights(data.result);
                     currentAnalysisId = null;
                 } else {
+                    if (data.sections && Object.keys(data.sections).length > 0) {
+                        displayAIInsights(Object.assign({}, currentRuleInsights, data.sections), true);
+                    }
                     // Poll again in 2 seconds
                     setTimeout(pollAIResults, 2000);
                 }
@@ -1740,7 +1797,15 @@ def weather_dashboard():
             }
         }
 
-        function displayAIInsights(aiAnalysis) {
+        function renderInsightItems(items, fallback, partial) {
+            if (Array.isArray(items) && items.length > 0) {
+                return items.map(item => `<li>${item}</li>`).join('');
+            }
+            // While streaming, sections that have not arrived yet show a loading line
+            return partial && !Array.isArray(items) ? '<li>Loading...</li>' : `<li>${fallback}</li>`;
+        }
+
+        function displayAIInsights(aiAnalysis, partial = false) {
             const aiContent = document.getElementById('ai-content');
             
             // Store AI insights for chatbot context
@@ -1751,36 +1816,27 @@ def weather_dashboard():
                     <div class="insight-section">
                         <h4>Location Context</h4>
                         <ul class="insight-list">
-                            ${aiAnalysis.context_warnings && aiAnalysis.context_warnings.length > 0 
-                                ? aiAnalysis.context_warnings.map(warning => `<li>${warning}</li>`).join('')
-                                : '<li>No specific warnings for this location</li>'
-                            }
+                            ${renderInsightItems(aiAnalysis.context_warnings, 'No specific warnings for this location', partial)}
                         </ul>
                     </div>
                     
                     <div class="insight-section">
                         <h4>Smart Suggestions</h4>
                         <ul class="insight-list">
-                            ${Array.isArray(aiAnalysis.suggestions) && aiAnalysis.suggestions.length > 0
-                                ? aiAnalysis.suggestions.map(suggestion => `<li>${suggestion}</li>`).join('')
-                                : '<li>Stay updated with local weather conditions</li>'
-                            }
+                            ${renderInsightItems(aiAnalysis.suggestions, 'Stay updated with local weather conditions', partial)}
                         </ul>
                     </div>
                     
                     <div class="insight-section">
                         <h4>Fun Facts</h4>
                         <ul class="insight-list">
-                            ${Array.isArray(aiAnalysis.fun_facts) && aiAnalysis.fun_facts.length > 0
-                                ? aiAnalysis.fun_facts.map(fact => `<li>${fact}</li>`).join('')
-                                : '<li>Weather conditions change throughout the day</li>'
-                            }
+                            ${renderInsightItems(aiAnalysis.fun_facts, 'Weather conditions change throughout the day', partial)}
                         </ul>
                     </div>
                 </div>
                 
                 <div class="climate-comparison">
-                    ${aiAnalysis.climate_comparison || 'Unable to analyze climate differences'}
+                    ${aiAnalysis.climate_comparison || (partial ? 'Analyzing climate differences...' : 'Unable to analyze climate differences')}
                 </div>
             `;
         }
@@ -1804,28 +1860,26 @@ def weather_dashboard():
             addChatMessage(message, 'user');
             chatInput.value = '';
             
+            // The server looks up the forecast itself; only identifiers and top suggestions are sent
+            const requestBody = JSON.stringify({
+                message: message,
+                conversation_id: chatConversationId,
+                forecast_id: currentWeatherData ? currentWeatherData.forecast_id : null,
+                location: currentWeatherData ? currentWeatherData.location : null,
+                ai_insights: {
+                    suggestions: currentAIInsights && Array.isArray(currentAIInsights.suggestions)
+                        ? currentAIInsights.suggestions.slice(0, 3)
+                        : []
+                }
+            });
+            
             try {
-                // Send message to chatbot API with context
-                const response = await fetch('/api/chatbot', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({
-                        message: message,
-                        weather_context: currentWeatherData || {},
-                        ai_insights: currentAIInsights || {}
-                    })
-                });
-                
-                const data = await response.json();
-                
-                if (data.success) {
-                    addChatMessage(data.response, 'bot');
+                // Render tokens as they arrive, falling back to a single response without stream support
+                if (window.ReadableStream && window.TextDecoder) {
+                    await streamChatMessage(requestBody);
                 } else {
-                    addChatMessage('Sorry, I encountered an error. Please try again.', 'bot');
+                    await fetchChatMessage(requestBody);
                 }
-                
             } catch (error) {
                 console.error('Chat error:', error);
                 addChatMessage('Sorry, I am having trouble connecting. Please try again.', 'bot');
@@ -1837,6 +1891,98 @@ def weather_dashboard():
             }
         }
         
+        async function fetchChatMessage(requestBody) {
+            // Send message to chatbot API with context
+            const response = await fetch('/api/chatbot', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: requestBody
+            });
+            
+            const data = await response.json();
+            
+            if (data.success) {
+                chatConversationId = data.conversation_id || chatConversationId;
+                addChatMessage(data.response, 'bot');
+            } else {
+                addChatMessage('Sorry, I encountered an error. Please try again.', 'bot');
+            }
+        }
+        
+        async function streamChatMessage(requestBody) {
+            const response = await fetch('/api/chatbot/stream', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: requestBody
+            });
+            
+            if (!response.ok || !response.body) {
+                const data = await response.json().catch(() => ({}));
+                addChatMessage(response.status === 429 && data.error ? data.error : 'Sorry, I encountered an error. Please try again.', 'bot');
+                return;
+            }
+            
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let botMessage = null;
+            let finished = false;
+            
+            while (!finished) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                
+                buffer += decoder.decode(value, { stream: true });
+                const events = buffer.split('\\n\\n');
+                buffer = events.pop();
+                
+                for (const rawEvent of events) {
+                    const event = parseServerSentEvent(rawEvent);
+                    if (!event) continue;
+                    
+                    if (event.type === 'token') {
+                        if (!botMessage) {
+                            botMessage = addChatMessage('', 'bot');
+                        }
+                        appendChatMessage(botMessage, event.data.content);
+                    } else if (event.type === 'done') {
+                        chatConversationId = event.data.conversation_id || chatConversationId;
+                        if (!botMessage) {
+                            addChatMessage(event.data.response, 'bot');
+                        }
+                        finished = true;
+                    } else if (event.type === 'error') {
+                        addChatMessage(event.data.error || 'Sorry, I encountered an error. Please try again.', 'bot');
+                        finished = true;
+                    }
+                }
+            }
+            
+            if (!finished && !botMessage) {
+                addChatMessage('Sorry, I encountered an error. Please try again.', 'bot');
+            }
+        }
+        
+        function parseServerSentEvent(rawEvent) {
+            let type = 'message';
+            const dataLines = [];
+            
+            for (const line of rawEvent.split('\\n')) {
+                if (line.startsWith('event:')) {
+                    type = line.slice(6).trim();
+                } else if (line.startsWith('data:')) {
+                    dataLines.push(line.slice(5).trim());
+                }
+            }
+            
+            if (dataLines.length === 0) return null;
+            return { type: type, data: JSON.parse(dataLines.join('\\n')) };
+        }
+        
         function addChatMessage(message, sender) {
             const messageDiv = document.createElement('div');
             messageDiv.className = `chat-message ${sender}`;
@@ -1862,6 +2008,13 @@ def weather_dashboard():
             
             // Scroll to bottom
             chatMessages.scrollTop = chatMessages.scrollHeight;
+            
+            return content;
+        }
+        
+        function appendChatMessage(content, text) {
+            content.textContent += text;
+            chatMessages.scrollTop = chatMessages.scrollHeight;
         }
 
         // Authentication functions
@@ -2096,7 +2249,7 @@ def weather_dashboard():
             if (!currentUser || !sessionToken) return;
 
             try {
-                const response = await fetch('/api/locations/saved', {
+                const response = await fetch('/api/locations/saved/overview', {
                     headers: {
                         'Authorization': `Bearer ${sessionToken}`
                     }
@@ -2125,13 +2278,18 @@ def weather_dashboard():
             savedLocationsList.innerHTML = locations.map(location => `
                 <div class="saved-location-item" data-location-id="${location.id}">
                     <div class="saved-location-name">${location.display_name || location.name}</div>
+                    ${location.conditions ? `
+                    <div class="saved-location-conditions">
+                        ${location.conditions.temp}°F, ${location.conditions.description}
+                        · H ${location.conditions.high}° / L ${location.conditions.low}° · ${location.conditions.pop}% rain
+                    </div>` : ''}
                     <div class="saved-location-details">
                         ${location.state ? location.state + ', ' : ''}${location.country}
                         <br>
                         <small>Last accessed: ${new Date(location.last_accessed).toLocaleDateString()}</small>
                     </div>
                     <div class="saved-location-actions">
-                        <button class="saved-location-load" onclick="loadSavedLocation(${location.lat}, ${location.lon})">Load Weather</button>
+                        <button class="saved-location-load" onclick="loadSavedLocation(${location.lat}, ${location.lon}, ${location.id})">Load Weather</button>
                         <button class="saved-location-delete" onclick="deleteSavedLocation(${location.id})">Delete</button>
                     </div>
                 </div>
@@ -2214,9 +2372,19 @@ def weather_dashboard():
             }
         }
 
-        function loadSavedLocation(lat, lon) {
+        function loadSavedLocation(lat, lon, locationId) {
             loadWeatherForLocation({ lat, lon });
             closeSavedLocationsPanel();
+
+            // Fire and forget: the server records the access and writes it in a later batch
+            if (sessionToken && locationId) {
+                fetch(`/api/locations/${locationId}/access`, {
+                    method: 'POST',
+                    headers: {
+                        'Authorization': `Bearer ${sessionToken}`
+                    }
+                }).catch(error => console.error('Error recording location access:', error));
+            }
         }
 
         async function updateSaveLocationButton() {
@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import record_cache_lookup
+
+# Processed One Call forecasts, shared by every endpoint in this process
+FORECAST_CACHE_TTL_SECONDS = int(os.getenv('FORECAST_CACHE_TTL_SECONDS', '600'))
+FORECAST_CACHE_MAX_ENTRIES = int(os.getenv('FORECAST_CACHE_MAX_ENTRIES', '1000'))
+
+_entries = OrderedDict()  # location key -> entry, least recently used first
+_entries_by_id = {}
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+def make_location_key(lat, lon):
+    """Round coordinates to about 1 km so nearby requests share a forecast"""
+    return f"{float(lat):.2f},{float(lon):.2f}"
+
+def get_cached_forecast(lat, lon, allow_stale=False):
+    """
+    Get the cached forecast entry for coordinates, or None if missing or expired
+    allow_stale returns expired entries too, for when the weather service is failing
+    """
+    key = make_location_key(lat, lon)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is None or (entry['expires_at'] <= time.time() and not allow_stale):
+            _stats["misses"] += 1
+            entry = None
+        else:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+    record_cache_lookup('forecast', entry is not None)
+    return entry
+
+def get_forecast_expiry(lat, lon):
+    """Get when the cached forecast for coordinates expires, without counting a hit or miss"""
+    with _lock:
+        entry = _entries.get(make_location_key(lat, lon))
+        return entry['expires_at'] if entry else None
+
+def get_forecast_by_id(forecast_id):
+    """
+    Get a forecast entry by id, even if it has expired
+    Callers holding an id want the exact forecast the user was shown
+    """
+    with _lock:
+        return _entries_by_id.get(forecast_id)
+
+def store_forecast(lat, lon, weather_data):
+    """Cache a processed forecast and return its new entry"""
+    key = make_location_key(lat, lon)
+    now = time.time()
+    forecast_id = f"{key}@{int(now * 1000)}"
+    entry = {
+        'forecast_id': forecast_id,
+        'location_key': key,
+        'data': dict(weather_data, forecast_id=forecast_id),
+        'fetched_at': now,
+        'expires_at': now + FORECAST_CACHE_TTL_SECONDS,
+        # Derived values (e.g. rendered prompts) memoized for this forecast version
+        'derived': {}
+    }
+
+    with _lock:
+        previous = _entries.pop(key, None)
+        if previous:
+            _entries_by_id.pop(previous['forecast_id'], None)
+        _entries[key] = entry
+        _entries_by_id[forecast_id] = entry
+
+        while len(_entries) > FORECAST_CACHE_MAX_ENTRIES:
+            _, evicted = _entries.popitem(last=False)
+            _entries_by_id.pop(evicted['forecast_id'], None)
+
+    return entry
+
+def get_forecast_cache_stats():
+    """Get hit/miss counters, hit rate and the current size of the forecast cache"""
+    with _lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return dict(_stats, hit_rate=round(_stats["hits"] / lookups, 4) if lookups else 0.0, size=len(_entries))
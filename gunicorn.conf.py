@@ -0,0 +1,17 @@
+import os
+import shutil
+
+# Loaded by gunicorn from the working directory; command-line options still take precedence
+
+# Prometheus multi-process mode: workers write metric samples to files here and /metrics sums them
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/stratus-metrics')
+
+def on_starting(server):
+    # Files left by a previous run would be added to this run's counters
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+def child_exit(server, worker):
+    from metrics import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -0,0 +1,75 @@
+import logging
+import os
+import threading
+import time
+
+# Dependency checks run in the background so health probes only read cached results
+HEALTH_CHECK_INTERVAL_SECONDS = int(os.getenv('HEALTH_CHECK_INTERVAL_SECONDS', '30'))
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_checks = {}  # name -> callable that raises when the dependency is unhealthy
+_status = {}  # name -> last result
+_thread = None
+
+def register_check(name, check):
+    """Register a dependency check; it is run every HEALTH_CHECK_INTERVAL_SECONDS"""
+    with _lock:
+        _checks[name] = check
+
+def run_checks():
+    """Run every registered check once and cache the results"""
+    with _lock:
+        checks = list(_checks.items())
+
+    for name, check in checks:
+        started = time.time()
+        try:
+            check()
+            error = None
+        except Exception as e:
+            error = str(e)
+        finished = time.time()
+
+        with _lock:
+            previous = _status.get(name, {})
+            _status[name] = {
+                'ok': error is None,
+                'error': error,
+                'latency_ms': round((finished - started) * 1000, 1),
+                'checked_at': finished,
+                'last_success_at': finished if error is None else previous.get('last_success_at')
+            }
+
+def start_health_checker():
+    """Start the background checker for this process; later calls are no-ops"""
+    global _thread
+
+    def run():
+        while True:
+            try:
+                run_checks()
+            except Exception:
+                logger.exception("Health checker error")
+            time.sleep(HEALTH_CHECK_INTERVAL_SECONDS)
+
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=run, name='health-checker', daemon=True)
+    _thread.start()
+
+def get_dependency_status():
+    """
+    Get the cached result of every check and whether all of them passed
+    Checks that have not run yet, or whose result is more than two intervals old, count as failing
+    """
+    now = time.time()
+    with _lock:
+        status = {name: dict(_status.get(name, {'ok': False, 'error': 'not checked yet'})) for name in _checks}
+    for result in status.values():
+        if result.get('checked_at') and now - result['checked_at'] > 2 * HEALTH_CHECK_INTERVAL_SECONDS:
+            result['ok'] = False
+            result['error'] = 'check result is stale'
+    return status, all(result['ok'] for result in status.values())
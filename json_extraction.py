@@ -0,0 +1,95 @@
+import json
+import re
+
+# Pulling a JSON value out of a model reply that wraps it in code fences or prose
+_CODE_FENCE = re.compile(r'```[a-zA-Z]*[ \t]*\n?(.*?)```', re.DOTALL)
+_JSON_CLOSERS = {'{': '}', '[': ']'}
+# How many bracket levels to look inside a span that is not the value wanted, e.g. "[see {...} below]"
+MAX_NESTED_CANDIDATE_DEPTH = 3
+
+def _iter_json_spans(text):
+    """
+    Yield each outermost balanced {...} or [...] span of text as (start, end, children), in one pass
+    children are the balanced spans directly inside it. Brackets inside JSON strings are skipped.
+    When an opener is never closed, or is closed by the wrong bracket, the balanced spans inside it
+    are yielded in its place, so a stray bracket in prose does not hide the JSON after it
+    """
+    stack = []  # (closer, start, children) for each open bracket
+    in_string = False
+    escaped = False
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char in _JSON_CLOSERS:
+            stack.append((_JSON_CLOSERS[char], i, []))
+        elif not stack:
+            continue
+        elif char == '"':
+            in_string = True
+        elif char in '}]':
+            closer, start, children = stack[-1]
+            if char == closer:
+                stack.pop()
+                span = (start, i + 1, children)
+                if stack:
+                    stack[-1][2].append(span)
+                else:
+                    yield span
+            else:
+                # Each frame's closed spans all come before the next frame opened, so this is in text order
+                for _, _, orphans in stack:
+                    yield from orphans
+                stack.clear()
+
+    for _, _, orphans in stack:
+        yield from orphans
+
+def _parse_span(text, span, accept, depth=0):
+    """Get the first acceptable value from a span, looking inside it when it is invalid or the wrong type"""
+    start, end, children = span
+    try:
+        value = json.loads(text[start:end])
+        if accept(value):
+            return value
+    except (json.JSONDecodeError, RecursionError):
+        # RecursionError comes from pathologically deep nesting
+        pass
+    if depth >= MAX_NESTED_CANDIDATE_DEPTH:
+        return None
+    for child in children:
+        value = _parse_span(text, child, accept, depth + 1)
+        if value is not None:
+            return value
+    return None
+
+def extract_json_from_response(content, expected_type=None):
+    """
+    Extract JSON from AI response, handling fenced blocks, surrounding prose and arrays
+    Returns the first value of expected_type (dict or list) when given, otherwise the first JSON value
+    """
+    if not content:
+        return None
+
+    def accept(value):
+        return expected_type is None or isinstance(value, expected_type)
+
+    try:
+        value = json.loads(content)
+        if accept(value):
+            return value
+    except (json.JSONDecodeError, RecursionError):
+        pass
+
+    # Fenced blocks first, then the whole response
+    sources = [match.group(1) for match in _CODE_FENCE.finditer(content)] + [content]
+    for source in sources:
+        for span in _iter_json_spans(source):
+            value = _parse_span(source, span, accept)
+            if value is not None:
+                return value
+    return None
@@ -0,0 +1,118 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, multiprocess
+except ImportError:
+    # prometheus_client is optional; without it the record functions do nothing and /metrics is off
+    prometheus_client = None
+
+# Prometheus metrics. Under gunicorn, PROMETHEUS_MULTIPROC_DIR (set in gunicorn.conf.py) makes every
+# worker write its samples to files in that directory, and /metrics adds them up across workers
+METRICS_ENABLED = prometheus_client is not None and os.getenv('METRICS_ENABLED', 'true').lower() != 'false'
+# When set, /metrics requires "Authorization: Bearer <token>"
+METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+PROMETHEUS_MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+
+REQUEST_BUCKETS_SECONDS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+UPSTREAM_BUCKETS_SECONDS = (0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30)
+
+if METRICS_ENABLED:
+    _request_duration = Histogram(
+        'stratus_http_request_duration_seconds', 'Time to produce a response, by route template',
+        ['method', 'route', 'status'], buckets=REQUEST_BUCKETS_SECONDS
+    )
+    _upstream_duration = Histogram(
+        'stratus_upstream_request_duration_seconds', 'Latency of calls to OpenWeather and OpenAI, by calling function',
+        ['dependency'], buckets=UPSTREAM_BUCKETS_SECONDS
+    )
+    _upstream_errors = Counter(
+        'stratus_upstream_errors_total', 'Failed calls to OpenWeather and OpenAI, by calling function', ['dependency']
+    )
+    _cache_lookups = Counter('stratus_cache_lookups_total', 'Cache lookups by cache and result', ['cache', 'result'])
+    _ai_tokens = Counter('stratus_ai_tokens_total', 'OpenAI tokens used, by call type', ['call_type', 'kind'])
+    _forecast_prompt_tokens = Counter(
+        'stratus_forecast_prompt_tokens_total',
+        'Forecast prompt tokens as raw JSON and as the table sent instead; counted_by=estimate without tiktoken',
+        ['encoding', 'counted_by']
+    )
+    # Gauges are per worker; livesum adds up the values of the workers that are still running
+    _db_connections_in_use = Gauge(
+        'stratus_db_pool_connections_in_use', 'Pooled database connections borrowed right now', multiprocess_mode='livesum'
+    )
+    _db_pool_capacity = Gauge(
+        'stratus_db_pool_max_connections', 'Maximum pooled database connections', multiprocess_mode='livesum'
+    )
+    _ai_jobs_in_progress = Gauge(
+        'stratus_ai_jobs_in_progress', 'Background AI analyses started and not yet finished', multiprocess_mode='livesum'
+    )
+
+def observe_request(method, route, status, seconds):
+    """Record a response; route is the URL rule (e.g. /api/locations/saved/<int:location_id>), not the raw path"""
+    if METRICS_ENABLED:
+        _request_duration.labels(method, route, str(status)).observe(seconds)
+
+def observe_upstream(dependency, seconds, error=False):
+    """Record one upstream call made on behalf of dependency (the calling function or AI call type)"""
+    if METRICS_ENABLED:
+        _upstream_duration.labels(dependency).observe(seconds)
+        if error:
+            _upstream_errors.labels(dependency).inc()
+
+def record_cache_lookup(cache, hit):
+    if METRICS_ENABLED:
+        _cache_lookups.labels(cache, 'hit' if hit else 'miss').inc()
+
+def record_ai_tokens(call_type, prompt_tokens, completion_tokens):
+    if METRICS_ENABLED:
+        _ai_tokens.labels(call_type, 'prompt').inc(prompt_tokens)
+        _ai_tokens.labels(call_type, 'completion').inc(completion_tokens)
+
+def record_forecast_prompt_tokens(json_tokens, table_tokens, estimated):
+    if METRICS_ENABLED:
+        counted_by = 'estimate' if estimated else 'tiktoken'
+        _forecast_prompt_tokens.labels('json', counted_by).inc(json_tokens)
+        _forecast_prompt_tokens.labels('table', counted_by).inc(table_tokens)
+
+def set_db_pool_capacity(max_connections):
+    if METRICS_ENABLED:
+        _db_pool_capacity.set(max_connections)
+
+@contextmanager
+def track_db_connection():
+    """Count a pooled connection as in use for the duration of the block"""
+    if not METRICS_ENABLED:
+        yield
+        return
+    _db_connections_in_use.inc()
+    try:
+        yield
+    finally:
+        _db_connections_in_use.dec()
+
+@contextmanager
+def track_ai_job():
+    """Count a background AI analysis as in progress for the duration of the block"""
+    if not METRICS_ENABLED:
+        yield
+        return
+    _ai_jobs_in_progress.inc()
+    try:
+        yield
+    finally:
+        _ai_jobs_in_progress.dec()
+
+def render_metrics():
+    """Get (body, content type) in the Prometheus text format, aggregated over all workers in multi-process mode"""
+    if PROMETHEUS_MULTIPROC_DIR:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return prometheus_client.generate_latest(registry), prometheus_client.CONTENT_TYPE_LATEST
+
+def mark_process_dead(pid):
+    """Drop a dead worker's live gauge files; called from the gunicorn master"""
+    if prometheus_client is not None and PROMETHEUS_MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,143 @@
+import logging
+import os
+import re
+import sys
+import time
+
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+# Versioned schema migrations: migrations/NNNN_name.sql, applied in order and recorded in schema_migrations
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+MIGRATION_LOCK_TIMEOUT_SECONDS = int(os.getenv('MIGRATION_LOCK_TIMEOUT_SECONDS', '300'))
+# Arbitrary application-wide key for pg_try_advisory_lock
+MIGRATION_LOCK_KEY = 7247301
+
+logger = logging.getLogger(__name__)
+
+_MIGRATION_FILE = re.compile(r'^(\d{4})_(\w+)\.sql$')
+_NO_TRANSACTION = re.compile(r'^--\s*migrate:\s*no-transaction\s*$', re.MULTILINE)
+_CONCURRENT_INDEX = re.compile(r'CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)', re.IGNORECASE)
+
+def load_migrations():
+    """Get (version, name, sql) for every migration file, in version order"""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        match = _MIGRATION_FILE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(MIGRATIONS_DIR, filename)) as f:
+            migrations.append((int(match.group(1)), match.group(2), f.read()))
+    return migrations
+
+def split_statements(sql):
+    """Split a migration into statements; migrations must not put ';' inside literals or bodies"""
+    statements = []
+    for statement in sql.split(';'):
+        lines = [line for line in statement.splitlines() if not line.strip().startswith('--')]
+        statement = '\n'.join(lines).strip()
+        if statement:
+            statements.append(statement)
+    return statements
+
+def _acquire_lock(cursor):
+    # Polling instead of pg_advisory_lock keeps waiting replicas from holding an open snapshot,
+    # which CREATE INDEX CONCURRENTLY in the lock holder would otherwise wait on
+    deadline = time.time() + MIGRATION_LOCK_TIMEOUT_SECONDS
+    while True:
+        cursor.execute('SELECT pg_try_advisory_lock(%s) AS locked', (MIGRATION_LOCK_KEY,))
+        if cursor.fetchone()['locked']:
+            return
+        if time.time() > deadline:
+            raise RuntimeError('Timed out waiting for the migration lock')
+        time.sleep(1)
+
+def _drop_invalid_index(cursor, statement):
+    """A failed CREATE INDEX CONCURRENTLY leaves an invalid index that IF NOT EXISTS would keep"""
+    match = _CONCURRENT_INDEX.search(statement)
+    if not match:
+        return
+    cursor.execute('''
+        SELECT 1 FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = %s AND NOT i.indisvalid
+    ''', (match.group(1),))
+    if cursor.fetchone():
+        logger.warning("Dropping invalid index %s left by an earlier failed migration", match.group(1))
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}')
+
+def _apply(conn, cursor, version, name, sql):
+    statements = split_statements(sql)
+    if _NO_TRANSACTION.search(sql):
+        # Statements like CREATE INDEX CONCURRENTLY cannot run in a transaction; each one
+        # must be idempotent since a failure part way through leaves earlier ones applied
+        conn.autocommit = True
+        try:
+            for statement in statements:
+                _drop_invalid_index(cursor, statement)
+                cursor.execute(statement)
+            cursor.execute('INSERT INTO schema_migrations (version, name) VALUES (%s, %s)', (version, name))
+        finally:
+            conn.autocommit = False
+        return
+
+    try:
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.execute('INSERT INTO schema_migrations (version, name) VALUES (%s, %s)', (version, name))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+def run_migrations(database_url=None):
+    """
+    Apply pending migrations under an advisory lock, so concurrent replicas apply each one once
+    Returns the versions applied by this call
+    """
+    database_url = database_url or os.getenv('DATABASE_URL')
+    if not database_url:
+        raise RuntimeError('DATABASE_URL is not set')
+
+    conn = psycopg2.connect(database_url, cursor_factory=RealDictCursor, connect_timeout=10)
+    conn.autocommit = True
+    cursor = conn.cursor()
+    applied = []
+    try:
+        _acquire_lock(cursor)
+        try:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    applied_at TIMESTAMP DEFAULT NOW()
+                )
+            ''')
+            cursor.execute('SELECT version FROM schema_migrations')
+            done = {row['version'] for row in cursor.fetchall()}
+            conn.autocommit = False
+
+            for version, name, sql in load_migrations():
+                if version in done:
+                    continue
+                logger.info("Applying migration %04d_%s", version, name)
+                _apply(conn, cursor, version, name, sql)
+                applied.append(version)
+        finally:
+            conn.autocommit = True
+            cursor.execute('SELECT pg_advisory_unlock(%s)', (MIGRATION_LOCK_KEY,))
+    finally:
+        cursor.close()
+        conn.close()
+    return applied
+
+if __name__ == '__main__':
+    # python migrate.py
+    from app_logging import setup_logging
+    setup_logging()
+    try:
+        versions = run_migrations()
+    except Exception as e:
+        print(f"Migration failed: {e}")
+        sys.exit(1)
+    print(f"Applied {len(versions)} migration(s)" if versions else "Database schema is up to date")
@@ -0,0 +1,15 @@
+-- migrate: no-transaction
+-- Indexes for the session auth lookup and the session reaper, built without blocking writes
+
+-- Only active sessions are indexed, with the columns the auth JOIN needs, so it stays an
+-- index-only scan as old sessions pile up (NOW() cannot appear in an index predicate)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_sessions_active_token
+    ON user_sessions(session_token) INCLUDE (user_id, expires_at)
+    WHERE is_active = TRUE;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_users_id_profile
+    ON users(id) INCLUDE (username, email, created_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_sessions_expires_at ON user_sessions(expires_at);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_sessions_inactive ON user_sessions(id) WHERE is_active = FALSE;
@@ -0,0 +1,201 @@
+import os
+import threading
+from collections import namedtuple
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.extensions
+from psycopg2.pool import ThreadedConnectionPool
+
+from metrics import set_db_pool_capacity, track_db_connection
+
+# Hot-path SQL, prepared once per pooled connection and returned as namedtuple rows
+DB_POOL_MIN_CONNECTIONS = int(os.getenv('DB_POOL_MIN_CONNECTIONS', '1'))
+DB_POOL_MAX_CONNECTIONS = int(os.getenv('DB_POOL_MAX_CONNECTIONS', '10'))
+
+SessionUser = namedtuple('SessionUser', 'id username email created_at')
+LoginUser = namedtuple('LoginUser', 'id username email password_hash created_at')
+SavedLocation = namedtuple('SavedLocation', 'id name lat lon state country display_name created_at last_accessed')
+
+_SAVED_LOCATION_COLUMNS = 'id, name, lat, lon, state, country, display_name, created_at, last_accessed'
+
+# name -> (parameter types, SQL with $n placeholders)
+STATEMENTS = {
+    'session_user': ('text', '''
+        SELECT u.id, u.username, u.email, u.created_at
+        FROM users u
+        JOIN user_sessions s ON u.id = s.user_id
+        WHERE s.session_token = $1
+        AND s.is_active = TRUE
+        AND s.expires_at > NOW()
+    '''),
+    'login_user_by_email': ('text', '''
+        SELECT id, username, email, password_hash, created_at FROM users WHERE email = $1 AND is_active = TRUE
+    '''),
+    'login_user_by_username': ('text', '''
+        SELECT id, username, email, password_hash, created_at FROM users WHERE username = $1 AND is_active = TRUE
+    '''),
+    'list_saved_locations': ('integer', f'''
+        SELECT {_SAVED_LOCATION_COLUMNS}
+        FROM saved_locations
+        WHERE user_id = $1
+        ORDER BY last_accessed DESC
+    '''),
+    'insert_saved_location': ('integer, text, numeric, numeric, text, text, text', f'''
+        INSERT INTO saved_locations (user_id, name, lat, lon, state, country, display_name, created_at, last_accessed)
+        VALUES ($1, $2, $3, $4, $5, $6, $7, NOW(), NOW())
+        ON CONFLICT (user_id, lat, lon) DO NOTHING
+        RETURNING {_SAVED_LOCATION_COLUMNS}
+    '''),
+    'delete_saved_location': ('integer, integer', '''
+        DELETE FROM saved_locations
+        WHERE id = $1 AND user_id = $2
+        RETURNING id
+    '''),
+    # Batched last_accessed writes: parallel arrays keep one statement shape for any batch size;
+    # only the owner's rows match and an older time never overwrites a newer one
+    'touch_saved_locations': ('integer[], integer[], double precision[]', '''
+        UPDATE saved_locations AS s
+        SET last_accessed = to_timestamp(v.accessed_at)
+        FROM unnest($1, $2, $3) AS v(id, user_id, accessed_at)
+        WHERE s.id = v.id AND s.user_id = v.user_id
+          AND (s.last_accessed IS NULL OR s.last_accessed < to_timestamp(v.accessed_at))
+    ''')
+}
+
+class PreparedConnection(psycopg2.extensions.connection):
+    """Connection that remembers whether the app's statements are prepared on it"""
+    prepared = False
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            database_url = os.getenv('DATABASE_URL')
+            if not database_url:
+                raise RuntimeError('DATABASE_URL is not set')
+            _pool = ThreadedConnectionPool(
+                DB_POOL_MIN_CONNECTIONS,
+                DB_POOL_MAX_CONNECTIONS,
+                database_url,
+                connect_timeout=10,
+                connection_factory=PreparedConnection
+            )
+            set_db_pool_capacity(DB_POOL_MAX_CONNECTIONS)
+        return _pool
+
+def _prepare(conn):
+    cursor = conn.cursor()
+    for name, (types, sql) in STATEMENTS.items():
+        cursor.execute(f'PREPARE {name} ({types}) AS {sql}')
+    cursor.close()
+    conn.commit()
+    conn.prepared = True
+
+@contextmanager
+def pooled_connection():
+    """Borrow a pooled connection with the statements prepared; it is rolled back unless committed"""
+    pool = _get_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        with track_db_connection():
+            if not conn.prepared:
+                _prepare(conn)
+            yield conn
+            conn.rollback()
+    except Exception:
+        broken = conn.closed != 0
+        if not broken:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+def ping():
+    """Run a trivial query on a pooled connection; raises if the database is unreachable"""
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+        cursor.close()
+
+def get_pool_stats():
+    """Get in-use and idle connection counts for this process's pool"""
+    with _pool_lock:
+        pool = _pool
+    if pool is None:
+        return {'initialized': False, 'max_connections': DB_POOL_MAX_CONNECTIONS}
+    # ThreadedConnectionPool keeps no public counters; read them under its own lock
+    with pool._lock:
+        return {
+            'initialized': True,
+            'in_use': len(pool._used),
+            'idle': len(pool._pool),
+            'max_connections': pool.maxconn
+        }
+
+def _execute(conn, name, params):
+    cursor = conn.cursor()
+    cursor.execute(f'EXECUTE {name} ({", ".join(["%s"] * len(params))})', params)
+    return cursor
+
+def get_session_user(session_token):
+    """Get the user for an active, unexpired session token, or None"""
+    with pooled_connection() as conn:
+        cursor = _execute(conn, 'session_user', (session_token,))
+        row = cursor.fetchone()
+        cursor.close()
+    return SessionUser(*row) if row else None
+
+def get_login_user(username_or_email, is_email):
+    """Get an active user with their password hash by email or username, or None"""
+    with pooled_connection() as conn:
+        cursor = _execute(conn, 'login_user_by_email' if is_email else 'login_user_by_username', (username_or_email,))
+        row = cursor.fetchone()
+        cursor.close()
+    return LoginUser(*row) if row else None
+
+def list_saved_locations(user_id):
+    """Get a user's saved locations, most recently accessed first"""
+    with pooled_connection() as conn:
+        cursor = _execute(conn, 'list_saved_locations', (user_id,))
+        rows = cursor.fetchall()
+        cursor.close()
+    return [SavedLocation(*row) for row in rows]
+
+def insert_saved_location(user_id, name, lat, lon, state, country, display_name):
+    """Save a location for a user; returns None if they already saved it"""
+    with pooled_connection() as conn:
+        cursor = _execute(conn, 'insert_saved_location', (user_id, name, lat, lon, state, country, display_name))
+        row = cursor.fetchone()
+        cursor.close()
+        conn.commit()
+    return SavedLocation(*row) if row else None
+
+def delete_saved_location(location_id, user_id):
+    """Delete a user's saved location; returns False if there was no such location"""
+    with pooled_connection() as conn:
+        cursor = _execute(conn, 'delete_saved_location', (location_id, user_id))
+        deleted = cursor.rowcount
+        cursor.close()
+        conn.commit()
+    return deleted > 0
+
+def touch_saved_locations(accesses):
+    """Write last_accessed for [(location_id, user_id, unix_time), ...]; returns rows updated"""
+    if not accesses:
+        return 0
+    location_ids, user_ids, accessed_at = (list(column) for column in zip(*accesses))
+    with pooled_connection() as conn:
+        cursor = _execute(conn, 'touch_saved_locations', (location_ids, user_ids, accessed_at))
+        updated = cursor.rowcount
+        cursor.close()
+        conn.commit()
+    return updated
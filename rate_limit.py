@@ -0,0 +1,180 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    # redis is optional; without it limits are kept per worker process
+    redis = None
+
+# Token-bucket request limits and concurrent-job caps, per client key
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() != 'false'
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '10000'))
+# Upper bound on how long a job slot can be held if its release is lost (e.g. a worker crash)
+JOB_SLOT_TTL_SECONDS = int(os.getenv('JOB_SLOT_TTL_SECONDS', '300'))
+
+logger = logging.getLogger(__name__)
+
+class MemoryRateLimitBackend:
+    """Rate limit state in this process only"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at), least recently used first
+        self._slots = {}  # key -> [acquired_at, ...]
+
+    def take_token(self, key, capacity, refill_per_second, now, cost=1):
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > RATE_LIMIT_MAX_KEYS:
+                self._buckets.popitem(last=False)
+            return allowed, tokens
+
+    def acquire_slot(self, key, limit, now):
+        with self._lock:
+            held = [acquired_at for acquired_at in self._slots.get(key, []) if acquired_at + JOB_SLOT_TTL_SECONDS > now]
+            if len(held) >= limit:
+                self._slots[key] = held
+                return False
+            held.append(now)
+            self._slots[key] = held
+            return True
+
+    def release_slot(self, key):
+        with self._lock:
+            held = self._slots.get(key)
+            if held:
+                held.pop(0)
+                if not held:
+                    del self._slots[key]
+
+class RedisRateLimitBackend:
+    """Rate limit state in Redis, shared by every worker and replica"""
+
+    _TAKE_TOKEN = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+    _ACQUIRE_SLOT = """
+local held = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+if held > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return 0
+end
+return 1
+"""
+
+    _RELEASE_SLOT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') > 0 then
+    return redis.call('DECR', KEYS[1])
+end
+return 0
+"""
+
+    def __init__(self, url):
+        self._client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+        self._take_token = self._client.register_script(self._TAKE_TOKEN)
+        self._acquire_slot = self._client.register_script(self._ACQUIRE_SLOT)
+        self._release_slot = self._client.register_script(self._RELEASE_SLOT)
+
+    def take_token(self, key, capacity, refill_per_second, now, cost=1):
+        allowed, tokens = self._take_token(keys=[f"ratelimit:bucket:{key}"], args=[capacity, refill_per_second, now, cost])
+        return bool(allowed), float(tokens)
+
+    def acquire_slot(self, key, limit, now):
+        return bool(self._acquire_slot(keys=[f"ratelimit:slots:{key}"], args=[limit, JOB_SLOT_TTL_SECONDS]))
+
+    def release_slot(self, key):
+        self._release_slot(keys=[f"ratelimit:slots:{key}"])
+
+def _create_backend():
+    if RATE_LIMIT_REDIS_URL:
+        if redis is None:
+            logger.warning("RATE_LIMIT_REDIS_URL is set but the redis package is not installed; using per-process rate limits")
+        else:
+            return RedisRateLimitBackend(RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimitBackend()
+
+_backend = _create_backend()
+
+class JobSlot:
+    """A held concurrent-job slot; release is idempotent"""
+
+    def __init__(self, key):
+        self.key = key
+        self.detached = False
+        self._released = False
+        self._lock = threading.Lock()
+
+    def detach(self):
+        """Take ownership of the slot so it outlives the request that acquired it"""
+        self.detached = True
+        return self
+
+    def release(self):
+        with self._lock:
+            if self._released:
+                return
+            self._released = True
+        try:
+            _backend.release_slot(self.key)
+        except Exception as e:
+            logger.warning("Rate limit slot release error: %s", e)
+
+def check_rate_limit(key, capacity, per_minute, cost=1):
+    """
+    Take cost tokens (one per request by default) from the key's bucket
+    Returns (allowed, headers) with RateLimit-* headers (and Retry-After when refused)
+    """
+    refill_per_second = per_minute / 60.0
+    now = time.time()
+    try:
+        allowed, tokens = _backend.take_token(key, capacity, refill_per_second, now, cost)
+    except Exception as e:
+        # Fail open: an unavailable limiter must not take the site down
+        logger.warning("Rate limit check error: %s", e)
+        return True, {}
+
+    headers = {
+        'RateLimit-Limit': str(capacity),
+        'RateLimit-Remaining': str(int(tokens)),
+        'RateLimit-Reset': str(math.ceil((capacity - tokens) / refill_per_second))
+    }
+    if not allowed:
+        headers['Retry-After'] = str(math.ceil((cost - tokens) / refill_per_second))
+    return allowed, headers
+
+def acquire_job_slot(key, limit):
+    """Get a concurrent-job slot for the key, or None when it already holds the maximum"""
+    try:
+        if not _backend.acquire_slot(key, limit, time.time()):
+            return None
+    except Exception as e:
+        logger.warning("Rate limit slot error: %s", e)
+    return JobSlot(key)
@@ -0,0 +1,96 @@
+import logging
+import os
+import threading
+import time
+
+# Periodic deletion of expired and logged-out sessions, a bounded batch at a time
+SESSION_REAPER_ENABLED = os.getenv('SESSION_REAPER_ENABLED', 'true').lower() != 'false'
+SESSION_REAPER_INTERVAL_SECONDS = int(os.getenv('SESSION_REAPER_INTERVAL_SECONDS', '900'))
+SESSION_REAPER_BATCH_SIZE = int(os.getenv('SESSION_REAPER_BATCH_SIZE', '1000'))
+SESSION_REAPER_MAX_BATCHES = int(os.getenv('SESSION_REAPER_MAX_BATCHES', '20'))
+
+logger = logging.getLogger(__name__)
+
+# SKIP LOCKED lets reapers in other workers or replicas run at the same time without waiting on each other
+_REAP_INACTIVE = '''
+    DELETE FROM user_sessions
+    WHERE id IN (
+        SELECT id FROM user_sessions
+        WHERE is_active = FALSE
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+'''
+
+_REAP_EXPIRED = '''
+    DELETE FROM user_sessions
+    WHERE id IN (
+        SELECT id FROM user_sessions
+        WHERE expires_at <= NOW()
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    )
+'''
+
+_lock = threading.Lock()
+_stats = {'runs': 0, 'deleted': 0, 'errors': 0, 'last_run_at': None}
+_thread = None
+
+def reap_sessions(get_connection):
+    """
+    Delete inactive and expired sessions in batches, committing after each one
+    Stops after SESSION_REAPER_MAX_BATCHES so a large backlog is worked off over several runs
+    """
+    conn = get_connection()
+    if not conn:
+        return 0
+
+    deleted = 0
+    try:
+        cursor = conn.cursor()
+        for statement in (_REAP_INACTIVE, _REAP_EXPIRED):
+            for _ in range(SESSION_REAPER_MAX_BATCHES):
+                cursor.execute(statement, (SESSION_REAPER_BATCH_SIZE,))
+                batch = cursor.rowcount
+                conn.commit()
+                deleted += batch
+                if batch < SESSION_REAPER_BATCH_SIZE:
+                    break
+        cursor.close()
+    finally:
+        conn.close()
+    return deleted
+
+def start_session_reaper(get_connection):
+    """Start the reaper thread for this process; later calls are no-ops"""
+    global _thread
+    if not SESSION_REAPER_ENABLED:
+        return
+
+    def run():
+        while True:
+            time.sleep(SESSION_REAPER_INTERVAL_SECONDS)
+            try:
+                deleted = reap_sessions(get_connection)
+                with _lock:
+                    _stats['deleted'] += deleted
+                if deleted:
+                    logger.info("Session reaper deleted %d sessions", deleted)
+            except Exception:
+                logger.exception("Session reaper error")
+                with _lock:
+                    _stats['errors'] += 1
+            with _lock:
+                _stats['runs'] += 1
+                _stats['last_run_at'] = time.time()
+
+    with _lock:
+        if _thread is not None:
+            return
+        _thread = threading.Thread(target=run, name='session-reaper', daemon=True)
+    _thread.start()
+
+def get_session_reaper_stats():
+    """Get reaper run and deletion counters"""
+    with _lock:
+        return dict(_stats, enabled=_thread is not None)
@@ -0,0 +1,32 @@
+import pytest
+
+from chat_answer_cache import find_cached_answer, store_answer
+
+def make_entry():
+    return {'derived': {}}
+
+@pytest.mark.parametrize('cached_question, question', [
+    ('What should I wear for a walk at 3pm?', 'What should I wear for a walk at 9pm?'),
+    ('What should I wear for a walk at 10am?', 'What should I wear for a walk at 11am?'),
+    ('Will it rain at 3:30pm?', 'Will it rain at 4:30pm?'),
+    ('Will it rain at 3:30pm?', 'Will it rain at 3:30am?'),
+    ("What's the high on the 14th?", "What's the high on the 15th?"),
+    ('Will it rain in the next 3 hours?', 'Will it rain in the next 5 hours?'),
+    ('Will it rain tomorrow morning?', 'Will it rain tomorrow evening?'),
+    ('Is it safe to go biking today?', 'Is it safe to go hiking today?'),
+    ('Is it a good day for a walk with my cat?', 'Is it a good day for a walk with my dog?'),
+])
+def test_different_times_do_not_share_an_answer(cached_question, question):
+    entry = make_entry()
+    store_answer(entry, cached_question, 'cached answer')
+    assert find_cached_answer(entry, question) is None
+
+@pytest.mark.parametrize('cached_question, question', [
+    ('What should I wear for a walk at 3pm?', 'what should i wear for a walk at 3 pm'),
+    ('Will it rain at 3pm today?', 'Hey, will it rain at 3pm today??'),
+    ('Is it going to be windy tomorrow?', 'is it going to be windy tomorrow'),
+])
+def test_rephrasings_of_the_same_question_hit(cached_question, question):
+    entry = make_entry()
+    store_answer(entry, cached_question, 'cached answer')
+    assert find_cached_answer(entry, question) == 'cached answer'
@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from chat_intents import answer_locally
+
+# Monday 2024-06-03 09:00 local time in a UTC-5 location
+OFFSET = -5 * 3600
+NOW = int(datetime(2024, 6, 3, 14, tzinfo=timezone.utc).timestamp())
+DAY = 86400
+HOUR = 3600
+
+WEATHER = {
+    'timezone_offset': OFFSET,
+    'current': {
+        'main': {'temp': 71.4, 'feels_like': 72.2, 'humidity': 60},
+        'wind': {'speed': 8.2},
+        'sys': {'sunrise': NOW - 3 * HOUR, 'sunset': NOW + 11 * HOUR}
+    },
+    'forecast': {
+        'hourly': [{'dt': NOW + i * HOUR, 'temp': 70 + i, 'pop': i / 20} for i in range(12)],
+        'daily': [
+            {'dt': NOW + 3 * HOUR + i * DAY, 'temp': {'day': 80, 'min': 60 + i, 'max': 80 + i},
+             'humidity': 50 + i, 'pop': i / 10, 'uvi': 5 + i}
+            for i in range(8)
+        ]
+    }
+}
+
+@pytest.mark.parametrize('question, expected', [
+    ("What's the high today?", 'The high today is 80°F.'),
+    ("What's the high tomorrow?", 'The high tomorrow is 81°F.'),
+    ('Will it rain on Wednesday?', 'The chance of precipitation on Wednesday is 20%.'),
+    ('Will it rain at 3pm?', 'The chance of precipitation at 3 PM is 30%.'),
+    ('What is the temperature?', 'It is currently 71°F and feels like 72°F.'),
+])
+def test_answers_resolvable_questions(question, expected):
+    assert answer_locally(question, WEATHER) == expected
+
+@pytest.mark.parametrize('question', [
+    'will it rain this weekend',
+    'will it snow next week',
+    'what was the high yesterday',
+    'chance of rain over the next 5 days',
+    'how cold will it get in january',
+    "what's the high on the 14th",
+    'what was the temperature last night',
+    'what is the high next monday',
+    'what is the high the day after tomorrow',
+    'will it rain at 3pm tomorrow',
+    'when is sunrise next week',
+])
+def test_forwards_time_references_it_cannot_resolve(question):
+    assert answer_locally(question, WEATHER) is None
+
+@pytest.mark.parametrize('question, expected', [
+    ('How hot is it?', 'It is currently 71°F and feels like 72°F.'),
+    ('How cold is it right now?', 'It is currently 71°F and feels like 72°F.'),
+    ("What's the temperature at 5pm?", 'The temperature at 5 PM is forecast to be 78°F.'),
+    ('How cold will it get tonight?', 'The low today is 60°F.'),
+])
+def test_answers_current_and_hourly_temperature(question, expected):
+    assert answer_locally(question, WEATHER) == expected
+
+@pytest.mark.parametrize('question', [
+    'How windy will it be at 6pm?',
+    "What's the humidity at 6pm?",
+    "What's the high at 5pm?",
+    'What will it feel like at 5pm?',
+    'When is sunset at 6pm?',
+])
+def test_forwards_hour_questions_the_hourly_forecast_cannot_answer(question):
+    assert answer_locally(question, WEATHER) is None
+
+@pytest.mark.parametrize('question', [
+    "what's the temperature in Denver right now",
+    "what's the temperature in denver right now",
+    'Will it rain in the Bronx today?',
+])
+def test_forwards_questions_about_other_places(question):
+    assert answer_locally(question, WEATHER, {'name': 'St. Louis'}) is None
+
+def test_answers_questions_naming_the_loaded_location():
+    answer = answer_locally("What's the high in St. Louis today?", WEATHER, {'name': 'St. Louis'})
+    assert answer == 'The high in St. Louis today is 80°F.'
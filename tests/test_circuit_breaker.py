@@ -0,0 +1,117 @@
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, 'time', clock)
+    return clock
+
+def make_breaker(**options):
+    options = dict(dict(failure_rate_threshold=0.5, minimum_calls=4, window_size=4, open_seconds=30), **options)
+    return CircuitBreaker('test', **options)
+
+def call(breaker, failed):
+    assert breaker.allow_request()
+    if failed:
+        breaker.record_failure()
+    else:
+        breaker.record_success()
+
+def test_stays_closed_below_minimum_calls(clock):
+    breaker = make_breaker()
+    for _ in range(3):
+        call(breaker, failed=True)
+    assert breaker.snapshot()['state'] == CircuitBreaker.CLOSED
+
+def test_opens_at_failure_rate_threshold(clock):
+    breaker = make_breaker()
+    for failed in (False, True, False, True):
+        call(breaker, failed)
+    assert breaker.snapshot()['state'] == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+    assert breaker.snapshot()['rejected'] == 1
+
+def test_failure_rate_is_over_the_window(clock):
+    breaker = make_breaker(failure_rate_threshold=0.75)
+    for failed in (True, False, False, False, False, False, True, True):
+        call(breaker, failed)
+    assert breaker.snapshot()['state'] == CircuitBreaker.CLOSED
+    # Four of nine calls failed overall, but three of the last four
+    call(breaker, failed=True)
+    assert breaker.snapshot()['state'] == CircuitBreaker.OPEN
+
+def trip(breaker):
+    for _ in range(4):
+        call(breaker, failed=True)
+    assert breaker.snapshot()['state'] == CircuitBreaker.OPEN
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 29
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.snapshot()['state'] == CircuitBreaker.HALF_OPEN
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+def test_successful_probe_closes_and_clears_the_window(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 30
+    call(breaker, failed=False)
+    snapshot = breaker.snapshot()
+    assert snapshot['state'] == CircuitBreaker.CLOSED
+    assert snapshot['window_calls'] == 1
+    assert snapshot['failure_rate'] == 0.0
+
+def test_failed_probe_reopens(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 30
+    call(breaker, failed=True)
+    assert breaker.snapshot()['state'] == CircuitBreaker.OPEN
+    clock.now += 29
+    assert not breaker.allow_request()
+
+def test_cancelled_probe_frees_the_probe(clock):
+    breaker = make_breaker()
+    trip(breaker)
+    clock.now += 30
+    assert breaker.allow_request()
+    breaker.cancel()
+    assert breaker.allow_request()
+
+def test_slow_calls_count_as_failures(clock):
+    breaker = make_breaker(slow_call_seconds=2)
+    for _ in range(4):
+        assert breaker.allow_request()
+        breaker.record_success(duration=5)
+    assert breaker.snapshot()['state'] == CircuitBreaker.OPEN
+
+@pytest.mark.parametrize('status_code, counts_as_failure', [
+    (None, True),
+    (429, True),
+    (500, True),
+    (503, True),
+    (400, False),
+    (401, False),
+    (404, False),
+])
+def test_record_error_classifies_status_codes(clock, status_code, counts_as_failure):
+    breaker = make_breaker()
+    assert breaker.allow_request()
+    breaker.record_error(status_code)
+    snapshot = breaker.snapshot()
+    assert snapshot['failures'] == (1 if counts_as_failure else 0)
+    assert snapshot['successes'] == (0 if counts_as_failure else 1)
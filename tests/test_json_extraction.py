@@ -0,0 +1,68 @@
+import json
+import random
+import time
+
+import pytest
+
+from json_extraction import extract_json_from_response
+
+# Replies recorded from the context, suggestions and insights calls, plus prose that broke extraction
+RECORDED_OUTPUTS = [
+    ('{"context_warnings": ["Much colder than home"], "climate_comparison": "Drier air"}', dict,
+     {"context_warnings": ["Much colder than home"], "climate_comparison": "Drier air"}),
+    ('```json\n{"suggestions": ["Bring a jacket", "Stay hydrated"]}\n```', dict,
+     {"suggestions": ["Bring a jacket", "Stay hydrated"]}),
+    ('```\n["Bring a jacket", "Stay hydrated"]\n```', list, ["Bring a jacket", "Stay hydrated"]),
+    ('Here are some fun facts:\n{"fun_facts": ["St. Louis sits near the confluence of two rivers"]}\nEnjoy!', dict,
+     {"fun_facts": ["St. Louis sits near the confluence of two rivers"]}),
+    ('Sure! Based on the forecast, here is the analysis:\n\n```json\n{\n  "context_warnings": [],\n'
+     '  "climate_comparison": "Similar to home"\n}\n```\nLet me know if you need anything else.', dict,
+     {"context_warnings": [], "climate_comparison": "Similar to home"}),
+    ('{"fun_facts": ["Braces like } and ] inside strings are fine", "So are \\"quotes\\""]}', dict,
+     {"fun_facts": ["Braces like } and ] inside strings are fine", 'So are "quotes"']}),
+    ('Note: temps in [F. {"suggestions": ["Wear layers"]}', dict, {"suggestions": ["Wear layers"]}),
+    ('Smiley :-{ here it is {"a": 1}', dict, {"a": 1}),
+    ('Result [see {"a": 1} above]', dict, {"a": 1}),
+    ('Mismatched {"a": [1, 2} then {"b": 2}', dict, {"b": 2}),
+    ('The list [1, 2, 3] comes before the object {"c": 3}', dict, {"c": 3}),
+    ('{"suggestions": ["Wear layers"]}', list, ["Wear layers"]),
+    ('I could not produce JSON for this request.', dict, None),
+    ('{"truncated": ["reply cut off by max_tok', dict, None),
+    ('', dict, None),
+]
+
+@pytest.mark.parametrize('content, expected_type, expected', RECORDED_OUTPUTS)
+def test_recorded_outputs(content, expected_type, expected):
+    assert extract_json_from_response(content, expected_type) == expected
+
+PAYLOAD = {"suggestions": ["Bring an umbrella"], "n": [1, {"k": None}]}
+
+@pytest.mark.parametrize('seed', range(200))
+def test_payload_survives_unclosed_brackets_in_prose(seed):
+    rng = random.Random(seed)
+    prefix = ''.join(rng.choice('[{(: abcF.-\n') for _ in range(rng.randint(0, 40)))
+    suffix = ''.join(rng.choice('[{( abc.\n') for _ in range(rng.randint(0, 40)))
+    content = f'{prefix}{json.dumps(PAYLOAD)}{suffix}'
+    assert extract_json_from_response(content, dict) == PAYLOAD
+
+@pytest.mark.parametrize('seed', range(200))
+def test_random_brackets_never_raise(seed):
+    rng = random.Random(seed)
+    content = ''.join(rng.choice('[]{}"\\:, a1') for _ in range(rng.randint(0, 300)))
+    value = extract_json_from_response(content)
+    assert value is None or isinstance(value, (dict, list, str, int, float))
+
+LARGE_INPUTS = {
+    'unclosed openers': '[' * 200000 + '{"a": 1}',
+    'deep nesting': '[' * 100000 + ']' * 100000,
+    'invalid deep nesting': '[' * 100000 + 'x' + ']' * 100000,
+    'many small spans': '[x] ' * 50000 + '{"a": 1}',
+    'open string': '{"' + 'a' * 200000,
+    'long prose': 'The weather is fine. ' * 20000 + '{"a": 1}',
+}
+
+@pytest.mark.parametrize('name', LARGE_INPUTS)
+def test_large_inputs_stay_linear(name):
+    started = time.perf_counter()
+    extract_json_from_response(LARGE_INPUTS[name], dict)
+    assert time.perf_counter() - started < 2.0
@@ -0,0 +1,82 @@
+import pytest
+
+import rate_limit
+from rate_limit import MemoryRateLimitBackend, acquire_job_slot, check_rate_limit
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, 'time', clock)
+    monkeypatch.setattr(rate_limit, '_backend', MemoryRateLimitBackend())
+    return clock
+
+def test_bucket_allows_a_burst_then_refuses(clock):
+    results = [check_rate_limit('client', 3, 60)[0] for _ in range(4)]
+    assert results == [True, True, True, False]
+
+def test_refused_request_reports_retry_after(clock):
+    for _ in range(3):
+        check_rate_limit('client', 3, 60)
+    allowed, headers = check_rate_limit('client', 3, 60)
+    assert not allowed
+    assert headers['RateLimit-Limit'] == '3'
+    assert headers['RateLimit-Remaining'] == '0'
+    assert headers['Retry-After'] == '1'
+
+def test_bucket_refills_over_time(clock):
+    for _ in range(3):
+        check_rate_limit('client', 3, 60)
+    clock.now += 2
+    assert [check_rate_limit('client', 3, 60)[0] for _ in range(3)] == [True, True, False]
+
+def test_refill_stops_at_capacity(clock):
+    check_rate_limit('client', 3, 60)
+    clock.now += 3600
+    _, headers = check_rate_limit('client', 3, 60)
+    assert headers['RateLimit-Remaining'] == '2'
+
+def test_keys_have_separate_buckets(clock):
+    check_rate_limit('a', 1, 60)
+    assert not check_rate_limit('a', 1, 60)[0]
+    assert check_rate_limit('b', 1, 60)[0]
+
+def test_cost_takes_several_tokens(clock):
+    allowed, headers = check_rate_limit('client', 10, 60, cost=4)
+    assert allowed
+    assert headers['RateLimit-Remaining'] == '6'
+
+def test_cost_above_remaining_tokens_is_refused_without_charging(clock):
+    check_rate_limit('client', 10, 60, cost=8)
+    allowed, headers = check_rate_limit('client', 10, 60, cost=3)
+    assert not allowed
+    assert headers['Retry-After'] == '1'
+    assert check_rate_limit('client', 10, 60, cost=2)[0]
+
+def test_job_slots_are_capped_per_key(clock):
+    first = acquire_job_slot('client', 2)
+    second = acquire_job_slot('client', 2)
+    assert first is not None and second is not None
+    assert acquire_job_slot('client', 2) is None
+    assert acquire_job_slot('other', 2) is not None
+
+def test_released_slot_can_be_reused(clock):
+    slot = acquire_job_slot('client', 1)
+    assert acquire_job_slot('client', 1) is None
+    slot.release()
+    slot.release()
+    assert acquire_job_slot('client', 1) is not None
+    assert acquire_job_slot('client', 1) is None
+
+def test_lost_slot_expires_after_ttl(clock):
+    acquire_job_slot('client', 1)
+    clock.now += rate_limit.JOB_SLOT_TTL_SECONDS - 1
+    assert acquire_job_slot('client', 1) is None
+    clock.now += 1
+    assert acquire_job_slot('client', 1) is not None
@@ -0,0 +1,17 @@
+from datetime import datetime, timezone
+
+from weather_rules import generate_rule_based_insights
+
+def test_rain_hour_is_in_the_forecast_location_time():
+    # 20:00 UTC is 3 PM in a UTC-5 location
+    wet_hour = int(datetime(2024, 6, 3, 20, tzinfo=timezone.utc).timestamp())
+    weather = {
+        'timezone_offset': -5 * 3600,
+        'current': {'main': {'temp': 70, 'feels_like': 70, 'humidity': 50}, 'weather': [{'id': 800}]},
+        'forecast': {
+            'hourly': [{'dt': wet_hour - 3600, 'pop': 0.1}, {'dt': wet_hour, 'pop': 0.8}],
+            'daily': [{'dt': wet_hour, 'pop': 0.4, 'temp': {'min': 60, 'max': 75}}]
+        }
+    }
+    warnings = generate_rule_based_insights(weather)['context_warnings']
+    assert 'Rain is likely around 3 PM (80% chance)' in warnings
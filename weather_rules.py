@@ -0,0 +1,127 @@
+from datetime import datetime, timezone
+
+# Thresholds for the rule-based insights (imperial units, matching the One Call request)
+EXTREME_HEAT_FEELS_LIKE = 105
+HEAT_FEELS_LIKE = 90
+FREEZING_FEELS_LIKE = 32
+EXTREME_COLD_FEELS_LIKE = 0
+MUGGY_HUMIDITY = 80
+MUGGY_MIN_TEMP = 75
+DRY_HUMIDITY = 25
+VERY_HIGH_UVI = 8
+HIGH_UVI = 6
+LIKELY_RAIN_POP = 0.6
+POSSIBLE_RAIN_POP = 0.3
+STRONG_WIND_SPEED = 25
+BREEZY_WIND_SPEED = 15
+
+def _weather_group(weather):
+    """Return the OpenWeather condition group (e.g. 2 for thunderstorms) of a weather list"""
+    condition_id = (weather or [{}])[0].get('id')
+    return condition_id // 100 if isinstance(condition_id, int) else None
+
+def local_time(timestamp, weather_data):
+    """Convert a Unix timestamp to the forecast location's local time"""
+    offset = weather_data.get('timezone_offset')
+    if offset is None:
+        return datetime.fromtimestamp(timestamp)
+    return datetime.fromtimestamp(timestamp + offset, tz=timezone.utc)
+
+def generate_rule_based_insights(weather_data):
+    """
+    Build context warnings and suggestions directly from processed weather data
+    Deterministic and local, used before AI results arrive and when the AI is unavailable
+    """
+    warnings = []
+    suggestions = []
+
+    current = weather_data.get('current', {})
+    forecast = weather_data.get('forecast', {})
+    daily = forecast.get('daily', [])
+    hourly = forecast.get('hourly', [])
+    today = daily[0] if daily else {}
+
+    main = current.get('main', {})
+    temp = main.get('temp')
+    feels_like = main.get('feels_like')
+    humidity = main.get('humidity')
+    wind_speed = current.get('wind', {}).get('speed')
+    uvi = today.get('uvi')
+    pop = today.get('pop')
+
+    # Temperature
+    if feels_like is not None:
+        if feels_like >= EXTREME_HEAT_FEELS_LIKE:
+            warnings.append(f"Dangerous heat: it feels like {round(feels_like)}°F, heat illness is possible with prolonged exposure")
+            suggestions.append("Limit time outdoors to early morning or evening and drink water regularly")
+        elif feels_like >= HEAT_FEELS_LIKE:
+            warnings.append(f"High heat index: it feels like {round(feels_like)}°F")
+            suggestions.append("Stay hydrated and take breaks in the shade during outdoor activities")
+        elif feels_like <= EXTREME_COLD_FEELS_LIKE:
+            warnings.append(f"Dangerous cold: it feels like {round(feels_like)}°F, frostbite can occur on exposed skin")
+            suggestions.append("Cover exposed skin and keep time outdoors short")
+        elif feels_like <= FREEZING_FEELS_LIKE:
+            warnings.append(f"Below freezing: it feels like {round(feels_like)}°F")
+            suggestions.append("Wear warm layers, a hat and gloves")
+
+    # Humidity
+    if humidity is not None:
+        if humidity >= MUGGY_HUMIDITY and temp is not None and temp >= MUGGY_MIN_TEMP:
+            warnings.append(f"High humidity ({humidity}%) will make it feel warmer and muggier than the temperature suggests")
+            suggestions.append("Wear light, breathable clothing")
+        elif humidity <= DRY_HUMIDITY:
+            warnings.append(f"Very dry air ({humidity}% humidity)")
+            suggestions.append("Use moisturizer and drink extra water in the dry air")
+
+    # UV index
+    if uvi is not None:
+        if uvi >= VERY_HIGH_UVI:
+            warnings.append(f"Very high UV index ({round(uvi, 1)}): unprotected skin can burn in minutes")
+            suggestions.append("Wear sunscreen and sunglasses, and seek shade around midday")
+        elif uvi >= HIGH_UVI:
+            warnings.append(f"High UV index ({round(uvi, 1)})")
+            suggestions.append("Apply sunscreen before spending time outside")
+
+    # Wind
+    if wind_speed is not None:
+        if wind_speed >= STRONG_WIND_SPEED:
+            warnings.append(f"Strong winds around {round(wind_speed)} mph")
+            suggestions.append("Secure loose outdoor items and take care when driving high-profile vehicles")
+        elif wind_speed >= BREEZY_WIND_SPEED:
+            warnings.append(f"Breezy conditions around {round(wind_speed)} mph")
+
+    # Precipitation and storms
+    group = _weather_group(current.get('weather'))
+    if group == 2:
+        warnings.append("Thunderstorms in the area")
+        suggestions.append("Head indoors if you hear thunder")
+    elif group == 6:
+        warnings.append("Snow is falling, roads and sidewalks may be slippery")
+        suggestions.append("Allow extra travel time and wear shoes with good grip")
+
+    if pop is not None:
+        if pop >= LIKELY_RAIN_POP:
+            warnings.append(f"Rain is likely today ({round(pop * 100)}% chance)")
+            suggestions.append("Bring an umbrella or rain jacket")
+        elif pop >= POSSIBLE_RAIN_POP:
+            suggestions.append(f"Keep an umbrella handy, there is a {round(pop * 100)}% chance of rain today")
+
+    # Rain in the next few hours
+    wet_hour = next((hour for hour in hourly if hour.get('pop', 0) >= LIKELY_RAIN_POP), None)
+    if wet_hour and (pop is None or pop < LIKELY_RAIN_POP) and 'dt' in wet_hour:
+        hour_time = local_time(wet_hour['dt'], weather_data).strftime('%I %p').lstrip('0')
+        warnings.append(f"Rain is likely around {hour_time} ({round(wet_hour['pop'] * 100)}% chance)")
+
+    # Best upcoming day for outdoor plans
+    upcoming = [day for day in daily[1:] if 'dt' in day]
+    if upcoming and any(day.get('pop', 0) >= LIKELY_RAIN_POP for day in upcoming):
+        driest = min(upcoming, key=lambda day: day.get('pop', 0))
+        if driest.get('pop', 0) < POSSIBLE_RAIN_POP:
+            # Daily dt is local noon, so the UTC calendar date is the local date
+            day_name = datetime.fromtimestamp(driest['dt'], tz=timezone.utc).strftime('%A')
+            suggestions.append(f"{day_name} looks like the driest day ahead for outdoor plans")
+
+    return {
+        "context_warnings": warnings,
+        "suggestions": suggestions
+    }